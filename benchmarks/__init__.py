@@ -0,0 +1,4 @@
+"""Нагрузочные замеры Yatube.
+
+Запуск: python -m benchmarks.<имя модуля> --help
+"""
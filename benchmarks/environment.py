@@ -0,0 +1,32 @@
+"""Отдельная база и каталог медиа для замеров.
+
+setup() нужно вызвать до первого обращения к базе: настройки проекта
+меняются на временные, чтобы замер не трогал рабочую базу.
+"""
+import os
+import tempfile
+
+import django
+from django.conf import settings
+
+
+def setup(database=None, eager_tasks=True):
+    """Настраивает Django на базу database (по умолчанию — новая
+    временная) и возвращает её путь"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    directory = tempfile.mkdtemp(prefix='yatube-bench-')
+    database = database or os.path.join(directory, 'db.sqlite3')
+    settings.DATABASES['default']['NAME'] = database
+    settings.DATABASES['replica']['NAME'] = database
+    settings.MEDIA_ROOT = os.path.join(directory, 'media')
+    settings.SQLITE_WRITE_LOCK_FILE = f'{database}.write-lock'
+    settings.TASKS_EAGER = eager_tasks
+    settings.DEBUG = False
+    django.setup()
+    return database
+
+
+def migrate():
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0)
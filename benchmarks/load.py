@@ -0,0 +1,329 @@
+"""Нагрузочный замер страниц Yatube.
+
+Заполняет временную базу (manage.py seed_yatube), затем проигрывает
+взвешенную смесь запросов к адресам posts/urls.py и печатает по каждому
+адресу p50/p95/p99 задержки, число SQL-запросов на запрос и RPS.
+
+Режимы:
+
+* client — django.test.Client в текущем процессе: задержка без сети,
+  точное число запросов к базе;
+* server — настоящий WSGI-сервер (wsgiref) и --concurrency потоков
+  клиентов по HTTP.
+
+Результат сохраняется в JSON (--save) и сравнивается с прошлым
+замером (--compare). Пример:
+
+    python -m benchmarks.load --requests 2000 --save before
+    python -m benchmarks.load --requests 2000 --compare before
+"""
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import threading
+import time
+from collections import defaultdict
+from http.cookiejar import Cookie, CookieJar
+from socketserver import ThreadingMixIn
+from urllib import error as urllib_error
+from urllib import parse, request as urllib_request
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from benchmarks import environment
+
+BASELINES_DIR = os.path.join(os.path.dirname(__file__), 'baselines')
+QUERIES_HEADER = 'X-Bench-Queries'
+CSRF_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+# Доли запросов: чтение лент преобладает, запись — несколько процентов
+MIX = [
+    ('index', 30),
+    ('group', 10),
+    ('profile', 15),
+    ('post', 20),
+    ('follow_index', 10),
+    ('search', 5),
+    ('add_comment', 5),
+    ('profile_follow', 3),
+    ('new_post', 2),
+]
+AUTHENTICATED = {'follow_index', 'add_comment', 'profile_follow', 'new_post'}
+
+
+class Scenario:
+    """Выбирает следующий запрос смеси на случайных данных"""
+
+    def __init__(self, rng):
+        from posts.models import Group, Post
+
+        self.rng = rng
+        self.posts = list(Post.objects.values_list('id', 'author__username'))
+        self.slugs = list(Group.objects.values_list('slug', flat=True))
+        self.usernames = sorted({username for _, username in self.posts})
+        self.names = [name for name, _ in MIX]
+        self.weights = [weight for _, weight in MIX]
+
+    def next(self):
+        """(имя, метод, адрес, данные формы)"""
+        from django.urls import reverse
+
+        name = self.rng.choices(self.names, self.weights)[0]
+        post_id, username = self.rng.choice(self.posts)
+        if name == 'index':
+            return name, 'GET', reverse('posts:index'), None
+        if name == 'group':
+            slug = self.rng.choice(self.slugs)
+            return name, 'GET', reverse('posts:group', args=[slug]), None
+        if name == 'profile':
+            return name, 'GET', reverse(
+                'posts:profile', args=[username]
+            ), None
+        if name == 'post':
+            return name, 'GET', reverse(
+                'posts:post', args=[username, post_id]
+            ), None
+        if name == 'follow_index':
+            return name, 'GET', reverse('posts:follow_index'), None
+        if name == 'search':
+            word = self.rng.choice(['лента', 'кот', 'django', 'город'])
+            return name, 'GET', reverse('posts:search') + '?' + (
+                parse.urlencode({'q': word})
+            ), None
+        if name == 'add_comment':
+            return name, 'POST', reverse(
+                'posts:add_comment', args=[username, post_id]
+            ), {'text': 'Комментарий из замера'}
+        if name == 'profile_follow':
+            author = self.rng.choice(self.usernames)
+            return name, 'GET', reverse(
+                'posts:profile_follow', args=[author]
+            ), None
+        return name, 'POST', reverse('posts:new_post'), {
+            'text': 'Пост из замера'
+        }
+
+
+def run_client(scenario, options, reader):
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    guest = Client()
+    user = Client()
+    user.force_login(reader)
+    samples = []
+    for _ in range(options.requests):
+        name, method, url, data = scenario.next()
+        client = user if name in AUTHENTICATED else guest
+        send = client.post if method == 'POST' else client.get
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            response = send(url, data or {})
+            elapsed = time.perf_counter() - started
+        samples.append((name, elapsed, len(context), response.status_code))
+    return samples
+
+
+class ThreadingServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def counting_application():
+    """WSGI-приложение, которое сообщает число SQL-запросов заголовком"""
+    from django.core.wsgi import get_wsgi_application
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    application = get_wsgi_application()
+
+    def wrapper(environ, start_response):
+        with CaptureQueriesContext(connection) as context:
+            def counting_start_response(status, headers, *args):
+                headers.append((QUERIES_HEADER, str(len(context))))
+                return start_response(status, headers, *args)
+            return application(environ, counting_start_response)
+    return wrapper
+
+
+class NoRedirectHandler(urllib_request.HTTPRedirectHandler):
+    # Как и django.test.Client, редиректы не выполняются: замер
+    # показывает время самого запроса
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def http_session(base_url, username=None):
+    """Открыватель urllib с cookies и токен CSRF вошедшего пользователя"""
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+
+    jar = CookieJar()
+    opener = urllib_request.build_opener(
+        urllib_request.HTTPCookieProcessor(jar), NoRedirectHandler
+    )
+    if username is None:
+        return opener, None
+    client = Client()
+    client.force_login(get_user_model().objects.get(username=username))
+    jar.set_cookie(Cookie(
+        0, settings.SESSION_COOKIE_NAME,
+        client.cookies[settings.SESSION_COOKIE_NAME].value,
+        None, False, '127.0.0.1', False, False, '/', True,
+        False, None, False, None, None, {},
+    ))
+    page = opener.open(base_url + '/new/').read().decode()
+    return opener, CSRF_RE.search(page).group(1)
+
+
+def run_server(scenario, options, reader):
+    server = make_server(
+        '127.0.0.1', 0, counting_application(),
+        server_class=ThreadingServer, handler_class=QuietHandler,
+    )
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    lock = threading.Lock()
+    samples = []
+    remaining = [options.requests]
+
+    def worker():
+        guest, _ = http_session(base_url)
+        user, token = http_session(base_url, reader.username)
+        while True:
+            with lock:
+                if not remaining[0]:
+                    return
+                remaining[0] -= 1
+                name, method, url, data = scenario.next()
+            opener = user if name in AUTHENTICATED else guest
+            body = None
+            if method == 'POST':
+                body = parse.urlencode(
+                    {**data, 'csrfmiddlewaretoken': token}
+                ).encode()
+            started = time.perf_counter()
+            try:
+                response = opener.open(base_url + url, body)
+                response.read()
+                status = response.status
+            except urllib_error.HTTPError as http_error:
+                response = http_error
+                status = http_error.code
+            elapsed = time.perf_counter() - started
+            queries = int(response.headers.get(QUERIES_HEADER, 0))
+            with lock:
+                samples.append((name, elapsed, queries, status))
+
+    threads = [
+        threading.Thread(target=worker) for _ in range(options.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    server.shutdown()
+    return samples
+
+
+def summarize(samples, duration):
+    groups = defaultdict(list)
+    for sample in samples:
+        groups[sample[0]].append(sample)
+        groups['total'].append(sample)
+    report = {}
+    for name, items in sorted(groups.items()):
+        latencies = sorted(item[1] * 1000 for item in items)
+        if len(latencies) > 1:
+            percentiles = statistics.quantiles(latencies, n=100)
+        else:
+            percentiles = latencies * 99
+        report[name] = {
+            'requests': len(items),
+            'p50_ms': round(percentiles[49], 2),
+            'p95_ms': round(percentiles[94], 2),
+            'p99_ms': round(percentiles[98], 2),
+            'queries': round(
+                statistics.mean(item[2] for item in items), 1
+            ),
+            'errors': sum(item[3] >= 400 for item in items),
+        }
+    report['total']['rps'] = round(len(samples) / duration, 1)
+    return report
+
+
+def print_report(report, baseline=None):
+    columns = ['requests', 'p50_ms', 'p95_ms', 'p99_ms', 'queries', 'errors']
+    print(f'{"":>15}' + ''.join(f'{column:>16}' for column in columns))
+    for name, row in report.items():
+        cells = []
+        for column in columns:
+            cell = f'{row[column]}'
+            old = (baseline or {}).get(name, {}).get(column)
+            if old and column.endswith('_ms'):
+                cell += f' {(row[column] - old) / old:+.0%}'
+            cells.append(f'{cell:>16}')
+        print(f'{name:>15}' + ''.join(cells))
+    print(f'RPS: {report["total"]["rps"]}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--mode', choices=['client', 'server'],
+                        default='client')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='Потоков клиентов в режиме server')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument('--comments', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--database',
+                        help='Готовая база вместо новой временной')
+    parser.add_argument('--save', metavar='NAME',
+                        help='Сохранить результат в baselines/NAME.json')
+    parser.add_argument('--compare', metavar='NAME',
+                        help='Сравнить с baselines/NAME.json')
+    options = parser.parse_args()
+
+    environment.setup(options.database)
+    from django.core.management import call_command
+
+    from posts.models import Follow
+
+    if not options.database:
+        environment.migrate()
+        call_command('seed_yatube', users=options.users, posts=options.posts,
+                     comments=options.comments, seed=options.seed)
+    rng = random.Random(options.seed)
+    scenario = Scenario(rng)
+    reader = Follow.objects.select_related('user').first().user
+    run = run_client if options.mode == 'client' else run_server
+    started = time.perf_counter()
+    samples = run(scenario, options, reader)
+    report = summarize(samples, time.perf_counter() - started)
+
+    baseline = None
+    if options.compare:
+        with open(os.path.join(BASELINES_DIR, f'{options.compare}.json'),
+                  encoding='utf-8') as file:
+            baseline = json.load(file)['report']
+    print_report(report, baseline)
+    if options.save:
+        os.makedirs(BASELINES_DIR, exist_ok=True)
+        with open(os.path.join(BASELINES_DIR, f'{options.save}.json'), 'w',
+                  encoding='utf-8') as file:
+            json.dump({'options': vars(options), 'report': report}, file,
+                      ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
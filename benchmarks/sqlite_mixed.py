@@ -0,0 +1,176 @@
+"""Пропускная способность SQLite при смешанной нагрузке.
+
+Несколько процессов одновременно читают страницу ленты и пишут
+комментарии (INSERT комментария и UPDATE счётчика поста в одной
+транзакции) в трёх режимах:
+
+* default — настройки SQLite по умолчанию (журнал DELETE);
+* wal — прагмы SQLITE_PRAGMAS из настроек проекта;
+* wal+queue — те же прагмы и очередь писателей yatube.sqlite.WriteLock.
+
+Пример: python -m benchmarks.sqlite_mixed --workers 8 --seconds 5
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from yatube import settings as project_settings
+from yatube.sqlite import WriteLock, apply_pragmas
+
+MODES = ('default', 'wal', 'wal+queue')
+SCHEMA = '''
+CREATE TABLE post (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL,
+    pub_date REAL NOT NULL,
+    comments_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX post_pub_date_idx ON post (pub_date DESC, id DESC);
+CREATE TABLE comment (
+    id INTEGER PRIMARY KEY,
+    post_id INTEGER NOT NULL REFERENCES post (id),
+    text TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX comment_post_idx ON comment (post_id, created DESC);
+'''
+FEED_SQL = '''
+SELECT id, text, pub_date, comments_count FROM post
+ORDER BY pub_date DESC, id DESC LIMIT 10
+'''
+
+
+def connect(path, mode):
+    connection = sqlite3.connect(path, timeout=5, isolation_level=None)
+    if mode != 'default':
+        apply_pragmas(connection.cursor(), project_settings.SQLITE_PRAGMAS)
+    return connection
+
+
+def prepare(path, posts):
+    connection = sqlite3.connect(path, isolation_level=None)
+    connection.executescript(SCHEMA)
+    now = time.time()
+    connection.executemany(
+        'INSERT INTO post (text, pub_date) VALUES (?, ?)',
+        ((f'Пост {number}', now - number) for number in range(posts))
+    )
+    connection.close()
+
+
+def write_comment(connection, posts):
+    post_id = random.randint(1, posts)
+    connection.execute('BEGIN')
+    try:
+        connection.execute(
+            'INSERT INTO comment (post_id, text, created) VALUES (?, ?, ?)',
+            (post_id, 'Комментарий', time.time()),
+        )
+        connection.execute(
+            'UPDATE post SET comments_count = comments_count + 1 '
+            'WHERE id = ?',
+            (post_id,),
+        )
+        connection.execute('COMMIT')
+    except sqlite3.Error:
+        connection.execute('ROLLBACK')
+        raise
+
+
+def worker(path, mode, options, results):
+    random.seed(os.getpid())
+    connection = connect(path, mode)
+    lock = WriteLock(f'{path}.write-lock') if mode == 'wal+queue' else None
+    reads = writes = errors = 0
+    latencies = []
+    deadline = time.monotonic() + options.seconds
+    while time.monotonic() < deadline:
+        started = time.monotonic()
+        try:
+            if random.random() < options.write_ratio:
+                if lock is None:
+                    write_comment(connection, options.posts)
+                else:
+                    with lock:
+                        write_comment(connection, options.posts)
+                writes += 1
+                latencies.append(time.monotonic() - started)
+            else:
+                connection.execute(FEED_SQL).fetchall()
+                reads += 1
+        except sqlite3.OperationalError:
+            # database is locked: запрос пользователя завершился ошибкой
+            errors += 1
+    connection.close()
+    results.put((reads, writes, errors, latencies))
+
+
+def run(mode, options):
+    directory = tempfile.mkdtemp(prefix='yatube-bench-')
+    path = os.path.join(directory, 'bench.sqlite3')
+    prepare(path, options.posts)
+    if mode != 'default':
+        # WAL включается в файле базы один раз
+        connect(path, mode).close()
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(
+            target=worker, args=(path, mode, options, results)
+        )
+        for _ in range(options.workers)
+    ]
+    for process in processes:
+        process.start()
+    totals = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    shutil.rmtree(directory, ignore_errors=True)
+    reads = sum(total[0] for total in totals)
+    writes = sum(total[1] for total in totals)
+    errors = sum(total[2] for total in totals)
+    latencies = sorted(
+        latency for total in totals for latency in total[3]
+    )
+    p95 = (
+        statistics.quantiles(latencies, n=20)[-1] * 1000
+        if len(latencies) > 1 else 0
+    )
+    return {
+        'mode': mode,
+        'reads/s': reads / options.seconds,
+        'writes/s': writes / options.seconds,
+        'errors': errors,
+        'write p95, ms': p95,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument(
+        '--mode', choices=MODES, action='append', dest='modes',
+        help='Режим замера, по умолчанию все',
+    )
+    options = parser.parse_args()
+    rows = [run(mode, options) for mode in options.modes or MODES]
+    columns = list(rows[0])
+    print(' | '.join(f'{column:>14}' for column in columns))
+    for row in rows:
+        print(' | '.join(
+            f'{value:>14.1f}' if isinstance(value, float)
+            else f'{value:>14}'
+            for value in row.values()
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Пропускная способность export_yatube и import_yatube.
+
+Заполняет временную базу (manage.py seed_yatube), выгружает её в NDJSON,
+очищает базу и загружает выгрузку обратно. Печатает число записей
+в секунду для выгрузки и загрузки (с пересборкой счётчиков, лент
+и поискового индекса) и размер файла.
+
+Пример: python -m benchmarks.transfer --posts 100000 --comments 200000
+"""
+import argparse
+import os
+import tempfile
+import time
+from io import StringIO
+
+from benchmarks import environment
+
+
+def measure(action):
+    started = time.perf_counter()
+    counts = action()
+    return sum(counts.values()), time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--posts', type=int, default=20000)
+    parser.add_argument('--comments', type=int, default=50000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    options = parser.parse_args()
+
+    environment.setup()
+    environment.migrate()
+    from django.core.management import call_command
+
+    from posts import transfer
+
+    call_command('seed_yatube', users=options.users, posts=options.posts,
+                 comments=options.comments, image_ratio=0,
+                 seed=options.seed, stdout=StringIO())
+    path = os.path.join(tempfile.mkdtemp(prefix='yatube-bench-'),
+                        'dump.ndjson')
+    with open(path, 'w', encoding='utf-8') as stream:
+        rows, export_seconds = measure(lambda: transfer.dump(stream))
+    call_command('flush', interactive=False, verbosity=0)
+    with open(path, encoding='utf-8') as stream:
+        _, import_seconds = measure(
+            lambda: transfer.load(stream, options.batch_size)
+        )
+    size = os.path.getsize(path) / 2 ** 20
+    print(f'Записей: {rows}, файл: {size:.1f} МиБ')
+    print(f'Выгрузка: {export_seconds:.1f} с, '
+          f'{rows / export_seconds:.0f} записей/с')
+    print(f'Загрузка: {import_seconds:.1f} с, '
+          f'{rows / import_seconds:.0f} записей/с')
+
+
+if __name__ == '__main__':
+    main()
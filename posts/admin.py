@@ -1,6 +1,8 @@
 from django.contrib import admin
+from django.db.models import Q
 
 from .models import Comment, Post, Group, Follow
+from .search import get_backend as get_search_backend
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -9,6 +11,13 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ("pub_date",)
     empty_value_display = "-пусто-"
 
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по полнотекстовому индексу вместо LIKE по всей таблице"""
+        if not search_term:
+            return queryset, False
+        ids = get_search_backend().search_ids(search_term)
+        return queryset.filter(id__in=ids), False
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ("pk", "title", "description")
@@ -20,9 +29,21 @@ class GroupAdmin(admin.ModelAdmin):
 
 class CommentAdmin(admin.ModelAdmin):
     list_display = ("pk", "post", "text", "author", "created")
-    search_fields = ("text", "author")
+    search_fields = ("text", "author__username")
     list_filter = ("created",)
 
+    def get_search_results(self, request, queryset, search_term):
+        """Комментарии к найденным постам и совпадения по самим полям"""
+        matched, use_distinct = super().get_search_results(
+            request, queryset, search_term
+        )
+        if not search_term:
+            return matched, use_distinct
+        ids = get_search_backend().search_ids(search_term)
+        return queryset.filter(
+            Q(post_id__in=ids) | Q(pk__in=matched.values('pk'))
+        ), use_distinct
+
 
 class FollowAdmin(admin.ModelAdmin):
     list_display = ("user", "author")
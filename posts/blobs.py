@@ -0,0 +1,49 @@
+"""Подсчёт ссылок на файлы картинок постов.
+
+Одинаковые картинки хранятся одним файлом (см. posts.storage), поэтому
+файл и его миниатюры можно удалить только тогда, когда на него не
+ссылается ни один пост.
+"""
+import logging
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import transaction
+from django.db.models import F
+from sorl.thumbnail import delete as delete_thumbnails
+from sorl.thumbnail.images import ImageFile
+
+from .models import ImageBlob, Post
+
+logger = logging.getLogger(__name__)
+
+
+def retain(name):
+    if not name:
+        return
+    updated = ImageBlob.objects.filter(name=name).update(refs=F('refs') + 1)
+    if not updated:
+        blob, created = ImageBlob.objects.get_or_create(
+            name=name, defaults={'refs': 1}
+        )
+        if not created:
+            ImageBlob.objects.filter(name=name).update(refs=F('refs') + 1)
+
+
+def release(name):
+    if not name:
+        return
+    ImageBlob.objects.filter(name=name).update(refs=F('refs') - 1)
+    transaction.on_commit(lambda: collect(name))
+
+
+def collect(name):
+    """Удаляет файл и его миниатюры, если на него больше нет ссылок"""
+    with transaction.atomic():
+        deleted, _ = ImageBlob.objects.filter(name=name, refs__lte=0).delete()
+    if not deleted:
+        return
+    storage = Post._meta.get_field('image').storage
+    try:
+        delete_thumbnails(ImageFile(name, storage))
+    except (SuspiciousFileOperation, OSError):
+        logger.warning('Не удалось удалить файл %s', name)
@@ -0,0 +1,294 @@
+"""Кеш страниц с версионированными ключами.
+
+Каждая область (лента, группа, профиль, пост) имеет счётчик поколения
+в таблице CacheScope. Сигналы сохранения и удаления постов,
+комментариев, групп и подписок увеличивают счётчики затронутых
+областей, поэтому закешированные страницы и фрагменты живут долго,
+но устаревают сразу после изменения.
+
+Счётчики хранятся в базе, а не в кеше: у каждого процесса gunicorn
+свой LocMemCache, и изменение, сделанное в одном процессе, должно
+сбросить страницы во всех. Страница из кеша процесса сверяется
+с поколением из базы при каждом чтении.
+
+Пересчёт устаревшего значения выполняет только один запрос (single
+flight): он берёт блокировку ключа, а остальные в это время получают
+прежнее значение. Чтобы все процессы не упирались в истечение срока
+одновременно, значение иногда пересчитывается заранее (XFetch).
+"""
+import hashlib
+import math
+import random
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import (
+    DateTimeField, F, IntegerField, Max, Subquery, Sum, Value,
+)
+from django.utils import timezone
+
+from yatube import timing
+
+from .models import CacheScope, Group
+
+PAGE_KEY = 'page:{}:{}'
+LOCK_KEY = 'lock:{}'
+
+INDEX = 'index'
+GROUPS = 'groups'
+
+
+def group_scope(slug):
+    return f'group:{slug}'
+
+
+def profile_scope(username):
+    return f'profile:{username}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def group_page_scopes(slug):
+    return [group_scope(slug), GROUPS]
+
+
+def profile_page_scopes(username):
+    return [profile_scope(username), GROUPS]
+
+
+def post_page_scopes(username, post_id):
+    return [post_scope(post_id), profile_scope(username), GROUPS]
+
+
+def post_scopes(post, *group_ids):
+    """Области кеша, в которых выводится пост"""
+    scopes = [INDEX, post_scope(post.pk), profile_scope(post.author.username)]
+    group_ids = {group_id for group_id in group_ids if group_id}
+    if group_ids:
+        slugs = Group.objects.filter(
+            pk__in=group_ids
+        ).values_list('slug', flat=True)
+        scopes += [group_scope(slug) for slug in slugs]
+    return scopes
+
+
+def _initial_generation():
+    # Новая строка области начинает отсчёт с текущего времени и не
+    # совпадает с поколением удалённой строки, под которым в кеше ещё
+    # могут лежать страницы
+    return int(time.time() * 1000)
+
+
+def scope_state(scopes):
+    """Поколения областей в порядке scopes и время последнего изменения
+    (unix time) одним запросом. Область без строки ещё не менялась."""
+    rows = {
+        name: (generation, modified)
+        for name, generation, modified in CacheScope.objects.filter(
+            name__in=set(scopes)
+        ).values_list('name', 'generation', 'modified')
+    }
+    generations = [rows.get(scope, (0, None))[0] for scope in scopes]
+    modified = max(
+        (modified.timestamp() for _, modified in rows.values()), default=0
+    )
+    return generations, modified
+
+
+def scope_annotations(scopes):
+    """Сумма поколений и время последнего изменения областей в виде
+    подзапросов: их можно прочитать тем же запросом, что и данные.
+
+    Поколения только растут, поэтому сумма меняется при любом bump().
+    """
+    rows = CacheScope.objects.filter(name__in=scopes).order_by().annotate(
+        scopes=Value(1, output_field=IntegerField())
+    ).values('scopes')
+    return {
+        'scopes_generation': Subquery(
+            rows.annotate(total=Sum('generation')).values('total')
+        ),
+        'scopes_modified': Subquery(
+            rows.annotate(latest=Max('modified')).values('latest'),
+            output_field=DateTimeField(),
+        ),
+    }
+
+
+def request_scope_state(request, scopes):
+    """scope_state, прочитанный из базы один раз за запрос"""
+    states = request.__dict__.setdefault('_scope_states', {})
+    key = tuple(scopes)
+    if key not in states:
+        states[key] = scope_state(scopes)
+    return states[key]
+
+
+def generations(scopes):
+    """Текущие поколения областей в порядке scopes"""
+    return scope_state(scopes)[0]
+
+
+def _fingerprint(generations):
+    raw = ':'.join(str(value) for value in generations)
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def version(*scopes):
+    """Короткий отпечаток поколений для ключей кеша"""
+    return _fingerprint(generations(scopes))
+
+
+def request_version(request, *scopes):
+    """version() без повторного чтения поколений в том же запросе"""
+    return _fingerprint(request_scope_state(request, scopes)[0])
+
+
+def modified_at(*scopes):
+    """Время последнего изменения областей (unix time)"""
+    return scope_state(scopes)[1]
+
+
+def bump(*scopes):
+    """Помечает области изменившимися во всех процессах.
+
+    Изменение пишется в той же транзакции, что и данные, поэтому другие
+    процессы видят новое поколение вместе с новыми данными.
+    """
+    scopes = sorted(set(scopes))
+    if not scopes:
+        return
+    now = timezone.now()
+    CacheScope.objects.bulk_create(
+        [CacheScope(name=scope, generation=_initial_generation(),
+                    modified=now)
+         for scope in scopes],
+        ignore_conflicts=True,
+    )
+    CacheScope.objects.filter(name__in=scopes).update(
+        generation=F('generation') + 1, modified=now
+    )
+
+
+def _is_fresh(envelope, version):
+    _, stored_version, expires_at, delta = envelope
+    if stored_version != version:
+        return False
+    # Вероятностное раннее истечение: чем дольше пересчёт (delta),
+    # тем раньше один из запросов решит обновить значение
+    early = delta * settings.CACHE_EARLY_EXPIRY_BETA * math.log(
+        1 - random.random()
+    )
+    return time.time() - early < expires_at
+
+
+def _acquire(key):
+    token = uuid.uuid4().hex
+    if cache.add(LOCK_KEY.format(key), token, settings.CACHE_LOCK_TIMEOUT):
+        return token
+    return None
+
+
+def _release(key, token):
+    lock_key = LOCK_KEY.format(key)
+    if cache.get(lock_key) == token:
+        cache.delete(lock_key)
+
+
+def _wait(key, version):
+    """Ждёт, пока значение пересчитает держатель блокировки"""
+    deadline = time.time() + settings.CACHE_LOCK_TIMEOUT
+    while time.time() < deadline:
+        time.sleep(settings.CACHE_LOCK_POLL_INTERVAL)
+        envelope = cache.get(key)
+        if envelope is not None and envelope[1] == version:
+            return envelope
+        if cache.get(LOCK_KEY.format(key)) is None:
+            break
+    return None
+
+
+def get_or_compute(key, compute, timeout, version=None):
+    """Значение из кеша с защитой от одновременного пересчёта.
+
+    Значение хранится вместе с версией, сроком свежести и временем
+    пересчёта. Устаревшее значение отдаётся, пока его пересчитывает
+    другой запрос, ещё CACHE_STALE_TIMEOUT секунд после истечения.
+    """
+    envelope = cache.get(key)
+    if envelope is not None and _is_fresh(envelope, version):
+        timing.record_cache('hit')
+        return envelope[0]
+    token = _acquire(key)
+    if token is None:
+        if envelope is not None:
+            timing.record_cache('stale')
+            return envelope[0]
+        envelope = _wait(key, version)
+        if envelope is not None:
+            timing.record_cache('hit')
+            return envelope[0]
+    timing.record_cache('miss')
+    try:
+        started = time.time()
+        value = compute()
+        delta = time.time() - started
+        cache.set(
+            key,
+            (value, version, time.time() + timeout, delta),
+            timeout + settings.CACHE_STALE_TIMEOUT,
+        )
+    finally:
+        if token is not None:
+            _release(key, token)
+    return value
+
+
+def page_cache_key(request):
+    user_id = request.user.pk if request.user.is_authenticated else 0
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return PAGE_KEY.format(path, user_id)
+
+
+class _Uncacheable(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+def cache_page_versioned(scopes, timeout=None):
+    """Кеширует ответ view до изменения одной из областей.
+
+    scopes — функция (request, **kwargs) -> список областей страницы.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+
+            def compute():
+                response = view_func(request, *args, **kwargs)
+                if response.status_code != 200:
+                    raise _Uncacheable(response)
+                if hasattr(response, 'render'):
+                    response.render()
+                return response
+
+            try:
+                return get_or_compute(
+                    page_cache_key(request),
+                    compute,
+                    timeout or settings.PAGE_CACHE_TIMEOUT,
+                    request_version(
+                        request, *scopes(request, *args, **kwargs)
+                    ),
+                )
+            except _Uncacheable as error:
+                return error.response
+        return wrapper
+    return decorator
@@ -0,0 +1,75 @@
+"""Рендер карточек постов для лент.
+
+Шаблон карточки загружается один раз на страницу, а не на каждый пост.
+При включённом POST_CARD_CACHE готовый HTML карточки хранится в кеше
+под ключом из id поста и отпечатка полей, которые читает шаблон:
+неизменившиеся карточки подставляются из кеша одним get_many.
+
+Закешированная карточка одна для всех читателей. Кнопки, зависящие
+от пользователя (комментировать или смотреть комментарии, правка
+для автора), в ней заменены меткой CARD_HOLE и дорисовываются
+после чтения из кеша маленьким шаблоном.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.safestring import mark_safe
+
+CARD_TEMPLATE = 'post_item.html'
+ACTIONS_TEMPLATE = 'post_item_actions.html'
+CARD_HOLE = '<!--card-actions-->'
+CARD_KEY = 'card:{}:{}'
+
+
+def card_version(post, *flags):
+    """Отпечаток данных карточки: меняется вместе с её содержимым"""
+    values = [
+        post.text,
+        post.pub_date.isoformat(),
+        post.image.name,
+        post.comments_count,
+        post.author.username,
+        post.group.slug if post.group else '',
+        post.group.title if post.group else '',
+        *(variant.url for variant in post.image_variants.all()),
+        *flags,
+    ]
+    raw = '\x00'.join(str(value) for value in values)
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def render_card(template, context, post, **extra):
+    with context.push(post=post, **extra):
+        return template.render(context)
+
+
+def render_cards(context, posts, **extra):
+    """HTML карточек постов в порядке posts"""
+    engine = context.template.engine
+    template = engine.get_template(CARD_TEMPLATE)
+    if not settings.POST_CARD_CACHE:
+        return mark_safe(''.join(
+            render_card(template, context, post, **extra) for post in posts
+        ))
+    actions = engine.get_template(ACTIONS_TEMPLATE)
+    flags = sorted(extra.items())
+    keys = [
+        CARD_KEY.format(post.pk, card_version(post, *flags))
+        for post in posts
+    ]
+    cached = cache.get_many(keys)
+    missing = {}
+    cards = []
+    for key, post in zip(keys, posts):
+        if key not in cached:
+            missing[key] = render_card(
+                template, context, post, card_holes=True, **extra
+            )
+        card = cached.get(key, missing.get(key))
+        cards.append(card.replace(
+            CARD_HOLE, render_card(actions, context, post), 1
+        ))
+    if missing:
+        cache.set_many(missing, settings.POST_CARD_CACHE_TIMEOUT)
+    return mark_safe(''.join(cards))
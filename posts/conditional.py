@@ -0,0 +1,118 @@
+"""Условные ответы (ETag / Last-Modified) для страниц поста, профиля
+и группы и для лент RSS/Atom.
+
+Валидаторы считаются одним запросом без рендеринга шаблона: ETag — из
+поколений областей кеша, счётчиков, зрителя и адреса страницы,
+Last-Modified — из даты последней записи и времени последнего изменения
+областей. Всё это читается из базы, а не из кеша процесса, поэтому
+каждый процесс gunicorn отвечает одинаково. При совпадении If-None-Match
+или If-Modified-Since клиент получает 304, и view не вызывается.
+"""
+import hashlib
+from datetime import datetime, timezone
+
+from django.db.models import Max
+from django.views.decorators.http import condition
+
+from . import caching
+from .models import Group, Post, User
+
+# Поля строки валидаторов с состоянием областей кеша (scope_annotations)
+STATE = ('scopes_generation', 'scopes_modified')
+
+
+def index_validators(request):
+    # Строка агрегата есть и при пустой таблице постов, поэтому
+    # области читаются через неё
+    return Post.objects.order_by().aggregate(
+        newest=Max('pub_date'),
+        **{
+            name: Max(subquery) for name, subquery in
+            caching.scope_annotations([caching.INDEX, caching.GROUPS]).items()
+        },
+    )
+
+
+def group_validators(request, slug):
+    return Group.objects.filter(slug=slug).order_by().annotate(
+        newest=Max('posts__pub_date'),
+        **caching.scope_annotations(caching.group_page_scopes(slug)),
+    ).values(*STATE, 'newest').first()
+
+
+def profile_validators(request, username):
+    return User.objects.filter(username=username).order_by().annotate(
+        newest=Max('posts__pub_date'),
+        **caching.scope_annotations(caching.profile_page_scopes(username)),
+    ).values(
+        *STATE,
+        'newest',
+        'stats__posts_count',
+        'stats__followers_count',
+        'stats__following_count',
+    ).first()
+
+
+def post_validators(request, username, post_id):
+    row = Post.objects.filter(
+        id=post_id, author__username=username
+    ).order_by().annotate(
+        newest_comment=Max('comments__created'),
+        **caching.scope_annotations(
+            caching.post_page_scopes(username, post_id)
+        ),
+    ).values(
+        *STATE,
+        'pub_date',
+        'newest_comment',
+        'comments_count',
+        'author__stats__posts_count',
+        'author__stats__followers_count',
+        'author__stats__following_count',
+    ).first()
+    if row is not None:
+        row['newest'] = max(filter(None, [
+            row.pop('pub_date'), row.pop('newest_comment'),
+        ]))
+    return row
+
+
+def _timestamp(value):
+    return value.timestamp() if value else 0
+
+
+def conditional_page(validators):
+    """Отвечает 304 Not Modified, пока данные страницы не изменились.
+
+    validators — функция (request, **kwargs) -> словарь из одного запроса
+    к базе или None, если страницы нет. В словаре состояние областей кеша
+    (STATE), дата последней записи newest и счётчики страницы.
+    """
+    def get(request, *args, **kwargs):
+        if not hasattr(request, '_page_validators'):
+            request._page_validators = validators(request, *args, **kwargs)
+        return request._page_validators
+
+    def etag(request, *args, **kwargs):
+        values = get(request, *args, **kwargs)
+        if values is None:
+            return None
+        raw = ':'.join(str(part) for part in [
+            request.user.pk,
+            request.get_full_path(),
+            *values.values(),
+        ])
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        values = get(request, *args, **kwargs)
+        if values is None:
+            return None
+        latest = max(
+            _timestamp(values['newest']),
+            _timestamp(values['scopes_modified']),
+            _timestamp(getattr(request.user, 'last_login', None)),
+        )
+        return datetime.fromtimestamp(latest, timezone.utc)
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
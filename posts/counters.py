@@ -0,0 +1,65 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Итоги хранятся в строке UserStats и в поле Post.comments_count и
+обновляются атомарными F-выражениями из сигналов. Если счётчики
+разошлись с данными, их пересчитывает команда recount.
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Post, User, UserStats
+
+
+def _count(queryset, field):
+    """Подзапрос с числом строк queryset, сгруппированных по field"""
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    ), 0)
+
+
+def change_user_stats(user_id, **deltas):
+    """Атомарно изменяет счётчики пользователя на заданные величины.
+
+    Счётчик не опускается ниже нуля. Пропавшая строка заводится заново
+    только при увеличении: уменьшения приходят и из каскадного удаления
+    пользователя, когда его строка счётчиков уже удалена, а сам он
+    вот-вот будет удалён.
+    """
+    updated = UserStats.objects.filter(user_id=user_id).update(**{
+        name: Greatest(F(name) + delta, 0) if delta < 0 else F(name) + delta
+        for name, delta in deltas.items()
+    })
+    if not updated and all(delta > 0 for delta in deltas.values()):
+        recount_users(User.objects.filter(pk=user_id))
+
+
+def change_comments_count(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comments_count=Greatest(F('comments_count') + delta, 0)
+    )
+
+
+def recount_users(users=None):
+    """Пересчитывает UserStats по фактическим данным"""
+    users = User.objects.all() if users is None else users
+    missing = users.filter(stats__isnull=True).values_list('pk', flat=True)
+    UserStats.objects.bulk_create(
+        (UserStats(user_id=user_id) for user_id in missing.iterator()),
+        ignore_conflicts=True,
+    )
+    stats = UserStats.objects.filter(user__in=users.values('pk'))
+    stats.update(
+        posts_count=_count(Post.objects.all(), 'author'),
+        followers_count=_count(Follow.objects.all(), 'author'),
+        following_count=_count(Follow.objects.all(), 'user'),
+    )
+
+
+def recount_posts(posts=None):
+    """Пересчитывает Post.comments_count по фактическим комментариям"""
+    posts = Post.objects.all() if posts is None else posts
+    posts.update(comments_count=_count(Comment.objects.all(), 'post'))
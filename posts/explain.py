@@ -0,0 +1,87 @@
+"""Планы запросов, которые выполняют страницы ленты.
+
+Запросы снимаются с настоящих view, поэтому план всегда соответствует
+коду, а не его копии. Полным просмотром считается чтение таблицы без
+индекса: «SCAN <таблица>» в SQLite и «Seq Scan» в PostgreSQL.
+"""
+import uuid
+from urllib.parse import urlencode
+
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from .models import Follow, Post
+
+# Служебный параметр, чтобы view не отдали страницу из кеша
+NONCE_PARAM = 'explain'
+
+
+def sample_urls():
+    """Адреса страниц для проверки и пользователь, который их открывает"""
+    post = (
+        Post.objects.filter(group__isnull=False).first()
+        or Post.objects.first()
+    )
+    if post is None:
+        return []
+    follow = Follow.objects.select_related('user').first()
+    reader = follow.user if follow else post.author
+    urls = [
+        ('index', reverse('posts:index'), None),
+        ('profile', reverse('posts:profile', args=[post.author.username]),
+         reader),
+        ('post', reverse(
+            'posts:post', args=[post.author.username, post.id]
+        ), reader),
+        ('follow_index', reverse('posts:follow_index'), reader),
+        ('search', reverse('posts:search') + '?' + urlencode(
+            {'q': (post.text.split() or [''])[0]}
+        ), None),
+    ]
+    if post.group is not None:
+        urls.insert(1, (
+            'group_posts',
+            reverse('posts:group', args=[post.group.slug]),
+            None,
+        ))
+    return urls
+
+
+def capture(path, user=None, using='default'):
+    """Выполняет GET-запрос к view и возвращает его SELECT-запросы"""
+    separator = '&' if '?' in path else '?'
+    request = RequestFactory().get(
+        f'{path}{separator}{NONCE_PARAM}={uuid.uuid4().hex}'
+    )
+    request.user = user or AnonymousUser()
+    match = resolve(request.path_info)
+    with CaptureQueriesContext(connections[using]) as context:
+        match.func(request, *match.args, **match.kwargs)
+    return [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].lstrip().upper().startswith('SELECT')
+    ]
+
+
+def explain(sql, using='default'):
+    """Возвращает строки плана запроса"""
+    connection = connections[using]
+    prefix = (
+        'EXPLAIN QUERY PLAN' if connection.vendor == 'sqlite' else 'EXPLAIN'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f'{prefix} {sql}')
+        return [str(row[-1]) for row in cursor.fetchall()]
+
+
+def is_full_scan(line):
+    line = line.strip()
+    if line.startswith('SCAN '):
+        return not any(
+            marker in line
+            for marker in (' USING ', 'VIRTUAL TABLE', 'CONSTANT ROW')
+        )
+    return 'Seq Scan' in line
@@ -0,0 +1,172 @@
+"""Ленты RSS и Atom: общая, группы и автора.
+
+Записи выбираются теми же запросами, что и страницы лент. Каждая лента
+отвечает 304 по ETag и Last-Modified (posts.conditional) и кешируется
+до появления новых постов в своей области (posts.caching).
+
+Клиент, приславший If-Modified-Since, получает только записи новее
+этой даты: если лента изменилась, заново сериализуются лишь новые
+посты. Такие ответы зависят от заголовка и не кешируются.
+"""
+import copy
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_http_date_safe
+from django.utils.text import Truncator
+from django.utils.timezone import utc
+
+from . import caching
+from .conditional import (
+    conditional_page, group_validators, index_validators,
+    profile_validators,
+)
+from .models import Group, Post, User
+from .queries import feed_queryset
+
+SINCE_HEADER = 'HTTP_IF_MODIFIED_SINCE'
+
+
+def modified_since(request):
+    """Дата из If-Modified-Since или None"""
+    timestamp = parse_http_date_safe(request.META.get(SINCE_HEADER, ''))
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, utc)
+
+
+class PostsFeed(Feed):
+    """Общая лента постов в RSS 2.0"""
+    title = 'Yatube: последние записи'
+    description = 'Последние записи на Yatube'
+    since = None
+
+    def __call__(self, request, *args, **kwargs):
+        # Экземпляр ленты общий для всех запросов, поэтому дата клиента
+        # хранится в копии на время одного ответа
+        feed = copy.copy(self)
+        feed.since = modified_since(request)
+        response = Feed.__call__(feed, request, *args, **kwargs)
+        # Last-Modified выставит conditional_page по данным области,
+        # а не по самой новой записи ответа, которой может и не быть
+        del response['Last-Modified']
+        if feed.since is not None:
+            patch_vary_headers(response, ['If-Modified-Since'])
+        return response
+
+    def link(self, obj):
+        return reverse('posts:index')
+
+    def get_posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        posts = feed_queryset(self.get_posts(obj))
+        if self.since is not None:
+            posts = posts.filter(pub_date__gt=self.since)
+        return posts.order_by('-pub_date', '-id')[:settings.FEED_ITEMS]
+
+    def item_title(self, item):
+        return f'@{item.author.username}: {Truncator(item.text).chars(60)}'
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post', args=[item.author.username, item.id])
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.username
+
+    def item_categories(self, item):
+        return [item.group.title] if item.group else []
+
+
+class GroupPostsFeed(PostsFeed):
+    """Лента постов группы"""
+
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, obj):
+        return f'Yatube: записи сообщества {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group', args=[obj.slug])
+
+    def get_posts(self, obj):
+        return obj.posts.all()
+
+
+class AuthorPostsFeed(PostsFeed):
+    """Лента постов автора"""
+
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, obj):
+        return f'Yatube: записи @{obj.username}'
+
+    def description(self, obj):
+        return f'Записи автора @{obj.username}'
+
+    def link(self, obj):
+        return reverse('posts:profile', args=[obj.username])
+
+    def get_posts(self, obj):
+        return obj.posts.all()
+
+
+def atom(feed_class):
+    """Та же лента в формате Atom 1.0"""
+    return type(
+        f'Atom{feed_class.__name__}', (feed_class,),
+        {'feed_type': Atom1Feed, 'subtitle': feed_class.description},
+    )
+
+
+def feed_view(feed, validators, scopes):
+    """View ленты с условными ответами и версионированным кешем"""
+    cached = caching.cache_page_versioned(scopes)(feed)
+
+    @conditional_page(validators)
+    def view(request, *args, **kwargs):
+        if SINCE_HEADER in request.META:
+            return feed(request, *args, **kwargs)
+        return cached(request, *args, **kwargs)
+    return view
+
+
+def _index_scopes(request):
+    return [caching.INDEX, caching.GROUPS]
+
+
+def _group_scopes(request, slug):
+    return caching.group_page_scopes(slug)
+
+
+def _author_scopes(request, username):
+    return caching.profile_page_scopes(username)
+
+
+index_rss = feed_view(PostsFeed(), index_validators, _index_scopes)
+index_atom = feed_view(atom(PostsFeed)(), index_validators, _index_scopes)
+group_rss = feed_view(GroupPostsFeed(), group_validators, _group_scopes)
+group_atom = feed_view(
+    atom(GroupPostsFeed)(), group_validators, _group_scopes
+)
+author_rss = feed_view(AuthorPostsFeed(), profile_validators, _author_scopes)
+author_atom = feed_view(
+    atom(AuthorPostsFeed)(), profile_validators, _author_scopes
+)
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import explain
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает планы запросов страниц ленты и отмечает полные '
+        'просмотры таблиц'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default='default',
+            help='База данных, на которой строятся планы',
+        )
+        parser.add_argument(
+            '--fail', action='store_true',
+            help='Завершиться с ошибкой, если найден полный просмотр',
+        )
+
+    def handle(self, *args, **options):
+        using = options['database']
+        urls = explain.sample_urls()
+        if not urls:
+            raise CommandError('Нет постов, чтобы открыть страницы')
+        scans = 0
+        for name, path, user in urls:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{name}: {path}'))
+            for sql in explain.capture(path, user, using):
+                plan = explain.explain(sql, using)
+                flagged = [line for line in plan if explain.is_full_scan(line)]
+                scans += len(flagged)
+                self.stdout.write(f'  {sql[:200]}')
+                for line in plan:
+                    if line in flagged:
+                        self.stdout.write(self.style.ERROR(
+                            f'    ПОЛНЫЙ ПРОСМОТР: {line}'
+                        ))
+                    else:
+                        self.stdout.write(f'    {line}')
+        message = f'Полных просмотров: {scans}'
+        if scans and options['fail']:
+            raise CommandError(message)
+        self.stdout.write(message)
@@ -0,0 +1,43 @@
+import gzip
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает пользователей, группы, подписки, посты и комментарии '
+        'в NDJSON (файл .gz сжимается)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output', nargs='?', default='-',
+            help='Файл выгрузки, по умолчанию stdout',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=transfer.CHUNK_SIZE,
+            help='Сколько строк читать из базы за раз',
+        )
+
+    def handle(self, *args, **options):
+        output = options['output']
+        started = time.monotonic()
+        if output == '-':
+            counts = transfer.dump(self.stdout, options['chunk_size'])
+        else:
+            opener = gzip.open if output.endswith('.gz') else open
+            with opener(output, 'wt', encoding='utf-8') as stream:
+                counts = transfer.dump(stream, options['chunk_size'])
+        report(self.stderr, counts, time.monotonic() - started, 'Выгружено')
+
+
+def report(stream, counts, seconds, verb):
+    total = sum(counts.values())
+    details = ', '.join(f'{label}: {count}' for label, count in counts.items())
+    stream.write(
+        f'{verb} записей: {total} ({details}) за {seconds:.1f} с, '
+        f'{total / max(seconds, 1e-6):.0f} в секунду'
+    )
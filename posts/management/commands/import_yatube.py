@@ -0,0 +1,45 @@
+import gzip
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+from posts.management.commands.export_yatube import report
+
+
+class Command(BaseCommand):
+    help = 'Загружает выгрузку export_yatube в пустую базу'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'input', nargs='?', default='-',
+            help='Файл выгрузки, по умолчанию stdin',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=transfer.BATCH_SIZE,
+            help='Сколько строк записывать одним INSERT',
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Загружать и в непустую базу',
+        )
+
+    def handle(self, *args, **options):
+        source = options['input']
+        started = time.monotonic()
+        try:
+            if source == '-':
+                counts = self.load(sys.stdin, options)
+            else:
+                opener = gzip.open if source.endswith('.gz') else open
+                with opener(source, 'rt', encoding='utf-8') as stream:
+                    counts = self.load(stream, options)
+        except ValueError as error:
+            raise CommandError(error)
+        report(self.stderr, counts, time.monotonic() - started, 'Загружено')
+
+    def load(self, stream, options):
+        return transfer.load(
+            stream, options['batch_size'], force=options['force']
+        )
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+from posts.models import Follow, User
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает материализованные ленты подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', action='append', dest='usernames', default=[],
+            help='Пересобрать ленту только этого пользователя',
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(
+            id__in=Follow.objects.values('user_id')
+        )
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+        # Посты тяжёлых авторов не раскладываются и при пересборке
+        timeline.pull_heavy_authors()
+        count = 0
+        for user_id in users.values_list('id', flat=True).iterator():
+            timeline.rebuild(user_id)
+            count += 1
+        self.stdout.write(f'Пересобрано лент: {count}')
@@ -0,0 +1,73 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from posts import seeding
+
+
+def moment(value):
+    """Дата ISO 8601; без часового пояса считается UTC"""
+    value = datetime.fromisoformat(value)
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, timezone.utc)
+    return value
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, подписками, '
+        'постами и комментариями'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument(
+            '--follows-per-user', type=int, default=20,
+            help='Среднее число подписок одного пользователя',
+        )
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument(
+            '--image-ratio', type=float, default=0.3,
+            help='Доля постов с картинкой',
+        )
+        parser.add_argument(
+            '--images', type=int, default=20,
+            help='Сколько разных картинок сгенерировать',
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней до --until разнести посты',
+        )
+        parser.add_argument(
+            '--until', type=moment, default=seeding.UNTIL,
+            help='Дата последнего поста, например 2025-01-01',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            counts = seeding.seed(
+                users=options['users'],
+                posts=options['posts'],
+                groups=options['groups'],
+                follows_per_user=options['follows_per_user'],
+                comments=options['comments'],
+                image_ratio=options['image_ratio'],
+                images=options['images'],
+                days=options['days'],
+                until=options['until'],
+                seed=options['seed'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        details = ', '.join(
+            f'{label}: {count}' for label, count in counts.items()
+        )
+        self.stdout.write(
+            f'Создано {details} за {time.monotonic() - started:.1f} с'
+        )
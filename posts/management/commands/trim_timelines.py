@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+from posts.models import TimelineEntry
+
+
+class Command(BaseCommand):
+    help = 'Обрезает материализованные ленты до TIMELINE_LENGTH записей'
+
+    def handle(self, *args, **options):
+        user_ids = TimelineEntry.objects.values_list(
+            'user_id', flat=True
+        ).distinct()
+        for user_id in user_ids.iterator():
+            timeline.trim(user_id)
+        self.stdout.write('Ленты обрезаны')
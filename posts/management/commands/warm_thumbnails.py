@@ -0,0 +1,28 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.thumbnails import _init_worker, prepare_post_images
+
+
+class Command(BaseCommand):
+    help = 'Создаёт миниатюры и варианты уже загруженных картинок постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=4,
+            help='Число процессов для рендера',
+        )
+
+    def handle(self, *args, **options):
+        post_ids = Post.objects.exclude(image='').exclude(
+            image__isnull=True
+        ).values_list('id', flat=True).iterator()
+        with ProcessPoolExecutor(
+            max_workers=options['processes'], initializer=_init_worker
+        ) as executor:
+            rendered = sum(executor.map(
+                prepare_post_images, post_ids, chunksize=16
+            ))
+        self.stdout.write(f'Создано миниатюр и вариантов: {rendered}')
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.6 on 2026-10-18 05:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheScope',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False, verbose_name='Область')),
+                ('generation', models.BigIntegerField(default=0, verbose_name='Поколение')),
+                ('modified', models.DateTimeField(verbose_name='Изменена')),
+            ],
+            options={
+                'verbose_name': 'Область кеша',
+                'verbose_name_plural': 'Области кеша',
+            },
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .storage import ContentAddressedStorage
+
 User = get_user_model()
 
 
@@ -31,16 +33,38 @@ class Post(models.Model):
     )
     image = models.ImageField(
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True,
         null=True,
         verbose_name='Изображение',
         help_text='Выбрать файл',
     )
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Количество комментариев',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
         ordering = ['-pub_date']
+        # Индексы повторяют сортировку лент (-pub_date, -id), чтобы
+        # страница читалась по индексу без сортировки
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_pub_date_idx',
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -101,6 +125,12 @@ class Comment(models.Model):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ['-created']
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_created_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -120,5 +150,166 @@ class Follow(models.Model):
         verbose_name="Автор",
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_follow',
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='follow_not_self',
+            ),
+        ]
+
     def __str__(self):
         return f'{self.user.username} subscribed to: {self.author.username}'
+
+
+class TimelineEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя"""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    # Дата публикации копируется из поста, чтобы лента сортировалась
+    # по индексу без обращения к таблице постов
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        ordering = ['-pub_date', '-post_id']
+        unique_together = ['user', 'post']
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_feed_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}: {self.post_id}'
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, которые выводятся в карточке автора"""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь',
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Записей',
+        default=0,
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Подписчиков',
+        default=0,
+    )
+    following_count = models.PositiveIntegerField(
+        verbose_name='Подписок',
+        default=0,
+    )
+    # Посты автора не раскладываются по лентам, а подтягиваются при
+    # чтении. Метка снимается только после заполнения лент подписчиков
+    pulled = models.BooleanField(
+        verbose_name='Посты подтягиваются в ленты при чтении',
+        default=False,
+    )
+
+    class Meta:
+        verbose_name = 'Статистика пользователя'
+        verbose_name_plural = 'Статистика пользователей'
+
+    def __str__(self):
+        return f'{self.user_id}: {self.posts_count}'
+
+
+class PostImageVariant(models.Model):
+    """Уменьшенная копия картинки поста для srcset"""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='image_variants',
+        verbose_name='Пост',
+    )
+    format = models.CharField(
+        verbose_name='Формат',
+        max_length=10,
+    )
+    name = models.CharField(
+        verbose_name='Файл',
+        max_length=255,
+    )
+    url = models.CharField(
+        verbose_name='Адрес',
+        max_length=255,
+    )
+    width = models.PositiveIntegerField(verbose_name='Ширина')
+    height = models.PositiveIntegerField(verbose_name='Высота')
+    size = models.PositiveIntegerField(verbose_name='Размер, байт')
+
+    class Meta:
+        verbose_name = 'Вариант картинки'
+        verbose_name_plural = 'Варианты картинок'
+        ordering = ['width']
+        unique_together = ['post', 'format', 'width']
+
+    def __str__(self):
+        return f'{self.post_id}: {self.width}w {self.format}'
+
+
+class ImageBlob(models.Model):
+    """Файл картинки и число постов, которые на него ссылаются"""
+    name = models.CharField(
+        verbose_name='Файл',
+        max_length=255,
+        primary_key=True,
+    )
+    refs = models.IntegerField(
+        verbose_name='Ссылок',
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'Файл картинки'
+        verbose_name_plural = 'Файлы картинок'
+
+    def __str__(self):
+        return f'{self.name}: {self.refs}'
+
+
+class CacheScope(models.Model):
+    """Поколение области кеша страниц, общее для всех процессов"""
+    name = models.CharField(
+        verbose_name='Область',
+        max_length=255,
+        primary_key=True,
+    )
+    generation = models.BigIntegerField(
+        verbose_name='Поколение',
+        default=0,
+    )
+    modified = models.DateTimeField(
+        verbose_name='Изменена',
+    )
+
+    class Meta:
+        verbose_name = 'Область кеша'
+        verbose_name_plural = 'Области кеша'
+
+    def __str__(self):
+        return f'{self.name}: {self.generation}'
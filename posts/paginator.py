@@ -0,0 +1,194 @@
+"""Курсорная (keyset) пагинация лент.
+
+Страница выбирается одним диапазонным запросом по индексу
+(pub_date, id) без COUNT(*) и OFFSET, поэтому дальние страницы
+открываются так же быстро, как первая. Позиция в ленте передаётся
+непрозрачными токенами ?after= и ?before=.
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils import timezone
+
+PAGE_PARAM = 'page'
+AFTER_PARAM = 'after'
+BEFORE_PARAM = 'before'
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(values):
+    """Непрозрачный токен из списка значений ключа сортировки"""
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, length):
+    """Список значений из токена; битый токен — InvalidCursor"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw.decode())
+    except (TypeError, ValueError):
+        raise InvalidCursor(token)
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursor(token)
+    return values
+
+
+class CursorPage:
+    """Страница курсорной пагинации"""
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return self.paginator.encode(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return self.paginator.encode(self.object_list[0])
+        return None
+
+
+class CursorPaginator:
+    """Пагинатор по упорядоченному набору уникальных полей"""
+
+    def __init__(self, queryset, per_page, ordering=('-pub_date', '-id')):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = ordering
+        self.fields = [name.lstrip('-') for name in ordering]
+
+    def encode(self, obj):
+        values = []
+        for name in self.fields:
+            value = getattr(obj, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat')
+                          else value)
+        return encode_cursor(values)
+
+    def decode(self, token):
+        """Значения ключа из токена, приведённые к типам полей.
+
+        Токен приходит от клиента, поэтому любое значение, которое
+        не приводится к типу поля, — такой же битый токен.
+        """
+        values = decode_cursor(token, len(self.fields))
+        model = self.queryset.model
+        for index, name in enumerate(self.fields):
+            field = model._meta.get_field(name)
+            try:
+                value = field.to_python(values[index])
+            except (ValidationError, TypeError, ValueError):
+                raise InvalidCursor(token)
+            if value is None:
+                raise InvalidCursor(token)
+            if isinstance(value, datetime) and timezone.is_naive(value):
+                value = timezone.make_aware(value, timezone.utc)
+            values[index] = value
+        return values
+
+    def _seek(self, values, reverse):
+        """Условие «строго после курсора» в порядке сортировки ленты"""
+        condition = Q()
+        equal = {}
+        for name, value in zip(self.ordering, values):
+            field = name.lstrip('-')
+            descending = name.startswith('-') != reverse
+            lookup = f'{field}__lt' if descending else f'{field}__gt'
+            condition |= Q(**equal, **{lookup: value})
+            equal[field] = value
+        return condition
+
+    def rows(self, values, reverse, limit):
+        """Первые limit строк строго после ключа values.
+
+        reverse — в обратном порядке сортировки, для листания назад.
+        """
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, reverse))
+        ordering = self.ordering
+        if reverse:
+            ordering = [name[1:] if name.startswith('-') else f'-{name}'
+                        for name in ordering]
+        return list(queryset.order_by(*ordering)[:limit])
+
+    def page(self, after=None, before=None):
+        reverse = before is not None and after is None
+        cursor = before if reverse else after
+        values = self.decode(cursor) if cursor is not None else None
+        rows = self.rows(values, reverse, self.per_page + 1)
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+            return CursorPage(rows, self, True, has_more)
+        return CursorPage(rows, self, has_more, cursor is not None)
+
+    def get_page(self, after=None, before=None):
+        """Как page(), но с битым токеном возвращает первую страницу"""
+        try:
+            return self.page(after, before)
+        except InvalidCursor:
+            return self.page()
+
+
+def paginate(request, queryset, per_page=None, ordering=('-pub_date', '-id'),
+             paginator_class=CursorPaginator):
+    """Контекст пагинации для шаблонов лент.
+
+    Старые ссылки вида ?page=N обслуживаются обычным Paginator,
+    остальные — paginator_class.
+    В режиме совместимости (PAGINATION_COMPAT) переменные page и
+    paginator остаются объектами Page и Paginator, построенными поверх
+    уже выбранной страницы, а курсоры передаются в переменной cursor.
+    """
+    per_page = per_page or settings.POSTS_PER_PAGE
+    after = request.GET.get(AFTER_PARAM)
+    before = request.GET.get(BEFORE_PARAM)
+    if PAGE_PARAM in request.GET and after is None and before is None:
+        paginator = Paginator(queryset.order_by(*ordering), per_page)
+        page = paginator.get_page(request.GET.get(PAGE_PARAM))
+        return {'page': page, 'paginator': paginator, 'cursor': None}
+    cursor = paginator_class(queryset, per_page, ordering).get_page(
+        after, before
+    )
+    if not settings.PAGINATION_COMPAT:
+        return {'page': cursor, 'paginator': cursor.paginator,
+                'cursor': cursor}
+    paginator = Paginator(cursor.object_list, per_page)
+    return {'page': paginator.page(1), 'paginator': paginator,
+            'cursor': cursor}
@@ -0,0 +1,30 @@
+"""Общий построитель запросов для лент постов.
+
+Карточке поста нужны автор, группа и число комментариев. Всё это
+выбирается одним запросом вместе с постами, поэтому страница ленты
+рендерится за постоянное число запросов независимо от её размера.
+"""
+
+# Колонки, которые читают post_item.html и ссылки на пост
+FEED_FIELDS = (
+    'id',
+    'text',
+    'pub_date',
+    'image',
+    'comments_count',
+    'author__username',
+    'group__slug',
+    'group__title',
+)
+
+
+def post_queryset(queryset):
+    """Посты вместе с автором, группой и вариантами картинки"""
+    return queryset.select_related('author', 'group').prefetch_related(
+        'image_variants'
+    )
+
+
+def feed_queryset(queryset):
+    """Подготавливает набор постов к выводу карточками"""
+    return post_queryset(queryset).only(*FEED_FIELDS)
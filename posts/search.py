@@ -0,0 +1,227 @@
+"""Полнотекстовый поиск по постам.
+
+По умолчанию используется виртуальная таблица SQLite FTS5 над текстом
+поста и названием его группы; она обновляется сигналами. Бэкенд
+выбирается настройкой SEARCH_BACKEND, в продакшене на PostgreSQL его
+можно заменить на PostgresSearchBackend (tsvector).
+"""
+import re
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Func, Q, TextField, Value
+from django.utils.functional import cached_property
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+
+from .models import Post
+from .paginator import InvalidCursor, decode_cursor
+
+FTS_TABLE = 'posts_post_fts'
+SNIPPET_TOKENS = 16
+# Служебные символы вокруг совпадений: заменяются на <mark> после
+# экранирования текста, чтобы пользовательский HTML не попал на страницу
+MARK_START = '\x02'
+MARK_END = '\x03'
+
+SearchHit = namedtuple('SearchHit', ['post_id', 'rank', 'snippet'])
+
+
+def _is_number(value, types):
+    return isinstance(value, types) and not isinstance(value, bool)
+
+
+def decode_search_cursor(token):
+    """Пара (rank, post_id) из курсора поиска; битый токен — InvalidCursor.
+
+    Значения идут в параметры SQL, поэтому их типы проверяются.
+    """
+    rank, post_id = decode_cursor(token, 2)
+    if not _is_number(rank, (int, float)) or not _is_number(post_id, int):
+        raise InvalidCursor(token)
+    return rank, post_id
+
+
+def highlight(snippet):
+    """Экранирует фрагмент и подсвечивает совпадения"""
+    return escape(snippet).replace(MARK_START, '<mark>').replace(
+        MARK_END, '</mark>'
+    )
+
+
+class BaseSearchBackend:
+    """Интерфейс поискового индекса"""
+
+    def index_post(self, post):
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+    def reindex_posts(self, posts):
+        for post in posts.select_related('group').iterator():
+            self.index_post(post)
+
+    def rebuild(self):
+        self.reindex_posts(Post.objects.all())
+
+    def search(self, query, limit, after=None):
+        """Список SearchHit, упорядоченный по (rank, post_id).
+
+        after — пара (rank, post_id) последнего результата прошлой
+        страницы.
+        """
+        raise NotImplementedError
+
+    def search_ids(self, query):
+        """Подзапрос или список id постов, подходящих под запрос"""
+        raise NotImplementedError
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """Поиск подстрокой для баз без полнотекстового индекса"""
+
+    def _queryset(self, query):
+        return Post.objects.filter(
+            Q(text__icontains=query) | Q(group__title__icontains=query)
+        )
+
+    def search(self, query, limit, after=None):
+        posts = self._queryset(query).order_by('-id')
+        if after is not None:
+            posts = posts.filter(id__lt=after[1])
+        return [
+            SearchHit(post_id, 0, escape(text[:200]))
+            for post_id, text in posts.values_list('id', 'text')[:limit]
+        ]
+
+    def search_ids(self, query):
+        return self._queryset(query).values('id')
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """Индекс FTS5: rowid виртуальной таблицы совпадает с id поста"""
+
+    def index_post(self, post):
+        group_title = post.group.title if post.group_id else ''
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk]
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, text, group_title) '
+                f'VALUES (%s, %s, %s)',
+                [post.pk, post.text, group_title],
+            )
+
+    def remove_post(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, text, group_title) '
+                f'SELECT p.id, p.text, COALESCE(g.title, \'\') '
+                f'FROM posts_post p '
+                f'LEFT JOIN posts_group g ON g.id = p.group_id'
+            )
+
+    @staticmethod
+    def match_expression(query):
+        """Запрос пользователя как набор префиксных фраз FTS5"""
+        words = re.findall(r'\w+', query)
+        return ' '.join('"{}"*'.format(word) for word in words)
+
+    def search(self, query, limit, after=None):
+        match = self.match_expression(query)
+        if not match:
+            return []
+        sql = (
+            f'SELECT rowid, rank, snippet({FTS_TABLE}, -1, %s, %s, %s, %s) '
+            f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+        )
+        params = [MARK_START, MARK_END, '…', SNIPPET_TOKENS, match]
+        if after is not None:
+            sql += 'AND (rank > %s OR (rank = %s AND rowid > %s)) '
+            params += [after[0], after[0], after[1]]
+        sql += 'ORDER BY rank, rowid LIMIT %s'
+        params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [
+                SearchHit(post_id, rank, highlight(snippet))
+                for post_id, rank, snippet in cursor.fetchall()
+            ]
+
+    def search_ids(self, query):
+        match = self.match_expression(query)
+        if not match:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+                [match],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """Поиск по tsvector в PostgreSQL.
+
+    Вектор строится из текста поста и названия группы; для скорости
+    в продакшене на это выражение создаётся GIN-индекс.
+    """
+
+    @cached_property
+    def config(self):
+        return getattr(settings, 'SEARCH_POSTGRES_CONFIG', 'russian')
+
+    def _queryset(self, query):
+        from django.contrib.postgres.search import (
+            SearchQuery, SearchRank, SearchVector,
+        )
+        vector = SearchVector('text', 'group__title', config=self.config)
+        search_query = SearchQuery(query, config=self.config)
+        return Post.objects.annotate(
+            search=vector,
+            # Отрицательный ранг, чтобы лучшие совпадения шли первыми
+            # при той же сортировке по возрастанию, что и в FTS5
+            rank=-SearchRank(vector, search_query),
+        ).filter(search=search_query), search_query
+
+    def search(self, query, limit, after=None):
+        posts, search_query = self._queryset(query)
+        if after is not None:
+            posts = posts.filter(
+                Q(rank__gt=after[0]) | Q(rank=after[0], id__gt=after[1])
+            )
+        posts = posts.annotate(snippet=Func(
+            Value(self.config), F('text'), search_query,
+            Value(f'StartSel={MARK_START}, StopSel={MARK_END}'),
+            function='ts_headline',
+            output_field=TextField(),
+        )).order_by('rank', 'id')
+        return [
+            SearchHit(post_id, rank, highlight(snippet))
+            for post_id, rank, snippet in posts.values_list(
+                'id', 'rank', 'snippet'
+            )[:limit]
+        ]
+
+    def search_ids(self, query):
+        return self._queryset(query)[0].values('id')
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = import_string(settings.SEARCH_BACKEND)()
+    return _backend
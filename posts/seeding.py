@@ -0,0 +1,250 @@
+"""Синтетические данные в объёме рабочей базы.
+
+Граф подписок и активность подчиняются степенному закону (Zipf):
+немногие популярные авторы собирают большинство подписчиков, пишут
+больше постов, а обсуждения собираются под небольшой частью постов.
+Посты равномерно разнесены по времени и группам, часть из них
+с картинками, причём картинки повторяются, как мемы в настоящей ленте.
+
+Все строки пишутся bulk_create пачками с заранее известными id, без
+сигналов и без чтения созданного обратно, поэтому миллион постов
+загружается за минуты. Миниатюры и варианты каждой картинки рендерятся
+один раз и раскладываются по всем постам с ней. Данные пишутся только
+в пустую базу, id начинаются с 1, а даты отсчитываются от until, поэтому
+при одинаковых seed и until данные совпадают.
+"""
+import itertools
+import random
+from collections import Counter
+from datetime import datetime
+from io import BytesIO, StringIO
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from PIL import Image
+
+from . import thumbnails
+from .models import (
+    Comment, Follow, Group, ImageBlob, Post, PostImageVariant, User,
+)
+from .transfer import (
+    REBUILD_COMMANDS, keep_auto_now_add, occupied_tables, reset_sequences,
+)
+
+BATCH_SIZE = 2000
+# Дата последнего поста по умолчанию
+UNTIL = datetime(2025, 1, 1, tzinfo=timezone.utc)
+WORDS = (
+    'лента пост автор подписка группа картинка комментарий новости '
+    'фото кот сегодня вчера завтра город поездка книга музыка кино '
+    'работа код django python база кеш запрос страница'
+).split()
+
+
+def zipf_cum_weights(count, exponent=1.1):
+    """Накопленные веса для random.choices: ранг 1 — самый популярный"""
+    return list(itertools.accumulate(
+        1 / (rank + 1) ** exponent for rank in range(count)
+    ))
+
+
+def text(rng, words=20):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, words)))
+
+
+def make_images(rng, count):
+    """Сохраняет count разных картинок и возвращает их имена"""
+    storage = Post._meta.get_field('image').storage
+    names = []
+    for number in range(count):
+        buffer = BytesIO()
+        color = tuple(rng.randrange(256) for _ in range(3))
+        Image.new('RGB', (1200, 800), color).save(buffer, 'JPEG')
+        names.append(storage.save(
+            f'posts/seed{number}.jpg', ContentFile(buffer.getvalue())
+        ))
+    return names
+
+
+def batched(iterable, size=BATCH_SIZE):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def bulk_insert(model, objects):
+    """Пишет объекты пачками, каждая пачка — своя транзакция"""
+    count = 0
+    for batch in batched(objects):
+        with transaction.atomic():
+            model.objects.bulk_create(batch)
+        count += len(batch)
+    return count
+
+
+class Seeder:
+    """Генератор одного набора данных; все случайности из одного seed"""
+
+    def __init__(self, users=1000, posts=10000, groups=20,
+                 follows_per_user=20, comments=20000, image_ratio=0.3,
+                 images=20, days=365, until=UNTIL, seed=0):
+        self.rng = random.Random(seed)
+        self.users = users
+        self.posts = posts
+        self.groups = groups
+        self.follows_per_user = follows_per_user
+        self.comments = comments
+        self.image_ratio = image_ratio
+        self.images = images
+        self.until = until
+        self.span = timezone.timedelta(days=days)
+
+    def pub_date(self, number):
+        """Посты идут по времени в порядке id, от until - span до until"""
+        return self.until - self.span * (1 - number / max(self.posts, 1))
+
+    def make_users(self):
+        self.user_ids = list(range(1, self.users + 1))
+        self.user_weights = zipf_cum_weights(self.users)
+        return bulk_insert(User, (
+            User(id=user_id, username=f'user{user_id}', password='!',
+                 date_joined=self.until - self.span)
+            for user_id in self.user_ids
+        ))
+
+    def make_groups(self):
+        self.group_ids = list(range(1, self.groups + 1))
+        return bulk_insert(Group, (
+            Group(id=group_id, title=f'Группа {group_id}',
+                  slug=f'group{group_id}', description=text(self.rng))
+            for group_id in self.group_ids
+        ))
+
+    def follow_pairs(self):
+        rng = self.rng
+        for user_id in self.user_ids:
+            count = min(
+                rng.randint(1, self.follows_per_user * 2), self.users - 1
+            )
+            authors = set(rng.choices(
+                self.user_ids, cum_weights=self.user_weights, k=count
+            ))
+            authors.discard(user_id)
+            for author_id in sorted(authors):
+                yield user_id, author_id
+
+    def make_follows(self):
+        return bulk_insert(Follow, (
+            Follow(id=follow_id, user_id=user_id, author_id=author_id)
+            for follow_id, (user_id, author_id)
+            in enumerate(self.follow_pairs(), 1)
+        ))
+
+    def post_objects(self, image_names):
+        rng = self.rng
+        groups = self.group_ids + [None]
+        for number in range(self.posts):
+            image = ''
+            if image_names and rng.random() < self.image_ratio:
+                image = rng.choice(image_names)
+                self.blob_refs[image] += 1
+            yield Post(
+                id=number + 1,
+                text=text(rng, 60),
+                pub_date=self.pub_date(number),
+                author_id=rng.choices(
+                    self.user_ids, cum_weights=self.user_weights
+                )[0],
+                group_id=rng.choice(groups),
+                image=image,
+            )
+
+    def make_posts(self):
+        self.image_names = []
+        if self.image_ratio and self.images:
+            self.image_names = make_images(self.rng, self.images)
+        self.blob_refs = Counter()
+        count = bulk_insert(Post, self.post_objects(self.image_names))
+        for name, refs in self.blob_refs.items():
+            _, created = ImageBlob.objects.get_or_create(
+                name=name, defaults={'refs': refs}
+            )
+            if not created:
+                ImageBlob.objects.filter(name=name).update(
+                    refs=F('refs') + refs
+                )
+        return count
+
+    def comment_objects(self):
+        """Обсуждения: комментарии к случайно выбранным по Zipf постам"""
+        rng = self.rng
+        if not self.posts:
+            return
+        ranks = list(range(self.posts))
+        rng.shuffle(ranks)
+        weights = zipf_cum_weights(self.posts, 0.8)
+        for start in range(0, self.comments, BATCH_SIZE):
+            numbers = rng.choices(
+                ranks, cum_weights=weights,
+                k=min(BATCH_SIZE, self.comments - start),
+            )
+            for comment_id, number in enumerate(numbers, start + 1):
+                posted = self.pub_date(number)
+                delay = timezone.timedelta(minutes=rng.expovariate(1 / 90))
+                yield Comment(
+                    id=comment_id,
+                    post_id=number + 1,
+                    author_id=rng.choice(self.user_ids),
+                    text=text(rng),
+                    created=min(posted + delay, self.until),
+                )
+
+    def make_comments(self):
+        return bulk_insert(Comment, self.comment_objects())
+
+    def variant_objects(self):
+        variants = {}
+        for name in set(self.image_names):
+            thumbnails.render_thumbnails(name)
+            variants[name] = thumbnails.render_variant_fields(name)
+        posts = Post.objects.exclude(image='').order_by('pk').values_list(
+            'id', 'image'
+        )
+        for post_id, name in posts.iterator():
+            for fields in variants.get(name, ()):
+                yield PostImageVariant(post_id=post_id, **fields)
+
+    def make_variants(self):
+        return bulk_insert(PostImageVariant, self.variant_objects())
+
+    def run(self):
+        """Создаёт данные и возвращает число строк по моделям"""
+        occupied = occupied_tables()
+        if occupied:
+            raise ValueError(f'База не пустая: {", ".join(occupied)}')
+        with keep_auto_now_add(Post, Comment):
+            counts = {
+                'user': self.make_users(),
+                'group': self.make_groups(),
+                'follow': self.make_follows(),
+                'post': self.make_posts(),
+                'comment': self.make_comments(),
+                'variant': self.make_variants(),
+            }
+        reset_sequences()
+        # bulk_create не отправляет сигналы: производные данные
+        # пересобираются командами обслуживания
+        for command in REBUILD_COMMANDS:
+            call_command(command, stdout=StringIO())
+        return counts
+
+
+def seed(**options):
+    """Заполняет базу и возвращает число созданных строк по моделям"""
+    return Seeder(**options).run()
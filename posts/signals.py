@@ -0,0 +1,150 @@
+from django.db.models.signals import (
+    post_delete, post_init, post_save, pre_delete,
+)
+from django.db import transaction
+from django.dispatch import receiver
+
+from . import blobs, caching, counters, tasks
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, raw=False, **kwargs):
+    """Заводит строку счётчиков для нового пользователя"""
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def push_post_to_timelines(sender, instance, created, **kwargs):
+    """Раскладывает новый пост по лентам подписчиков"""
+    if created:
+        counters.change_user_stats(instance.author_id, posts_count=1)
+        tasks.fan_out_post.delay(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def decrement_posts_count(sender, instance, **kwargs):
+    counters.change_user_stats(instance.author_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comments_count(sender, instance, created, **kwargs):
+    if created:
+        counters.change_comments_count(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comments_count(sender, instance, **kwargs):
+    counters.change_comments_count(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    """Добавляет в ленту посты автора, на которого подписались"""
+    if created:
+        counters.change_user_stats(instance.author_id, followers_count=1)
+        counters.change_user_stats(instance.user_id, following_count=1)
+        tasks.backfill_timeline.delay(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def trim_timeline(sender, instance, **kwargs):
+    """Убирает из ленты посты автора, от которого отписались"""
+    counters.change_user_stats(instance.author_id, followers_count=-1)
+    counters.change_user_stats(instance.user_id, following_count=-1)
+    tasks.remove_author_from_timeline.delay(
+        instance.user_id, instance.author_id
+    )
+
+
+@receiver(post_init, sender=Post)
+def remember_initial_values(sender, instance, **kwargs):
+    # Отложенные поля не читаем, чтобы не делать лишних запросов
+    instance._initial_group_id = instance.__dict__.get('group_id')
+    instance._initial_image = str(instance.__dict__.get('image') or '')
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    caching.bump(*caching.post_scopes(
+        instance, instance.group_id, instance._initial_group_id
+    ))
+    instance._initial_group_id = instance.group_id
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    post = Post.objects.filter(pk=instance.post_id).select_related(
+        'author'
+    ).first()
+    if post is not None:
+        caching.bump(*caching.post_scopes(post, post.group_id))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_pages(sender, instance, **kwargs):
+    caching.bump(
+        caching.INDEX,
+        caching.GROUPS,
+        caching.group_scope(instance.slug),
+    )
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_pages(sender, instance, **kwargs):
+    usernames = User.objects.filter(
+        pk__in=[instance.user_id, instance.author_id]
+    ).values_list('username', flat=True)
+    caching.bump(*(caching.profile_scope(name) for name in usernames))
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    tasks.index_posts.delay([instance.pk])
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    tasks.index_posts.delay([instance.pk])
+
+
+@receiver(post_save, sender=Group)
+def reindex_group_posts(sender, instance, created, **kwargs):
+    if not created:
+        tasks.index_group_posts.delay(instance.pk)
+
+
+@receiver(pre_delete, sender=Group)
+def remember_group_posts(sender, instance, **kwargs):
+    instance._post_ids = list(instance.posts.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Group)
+def reindex_ungrouped_posts(sender, instance, **kwargs):
+    tasks.index_posts.delay(instance._post_ids)
+
+
+@receiver(post_save, sender=Post)
+def prepare_thumbnails(sender, instance, created, **kwargs):
+    image = str(instance.image or '')
+    if image != instance._initial_image or (created and image):
+        blobs.retain(image)
+        if not created:
+            blobs.release(instance._initial_image)
+        # Картинка рендерится после коммита: в режиме TASKS_EAGER
+        # это не должно задерживать транзакцию запроса
+        post_id = instance.pk
+        transaction.on_commit(
+            lambda: tasks.prepare_post_images.delay(post_id)
+        )
+    instance._initial_image = image
+
+
+@receiver(post_delete, sender=Post)
+def release_image(sender, instance, **kwargs):
+    blobs.release(str(instance.image or ''))
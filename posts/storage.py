@@ -0,0 +1,65 @@
+"""Хранилище картинок с адресацией по содержимому.
+
+Загрузка хешируется sha256 по мере записи на диск, и файл сохраняется
+один раз под именем <каталог>/<2 символа>/<хеш><расширение>. Повторная
+загрузка той же картинки не занимает места и использует те же
+миниатюры. Число постов, ссылающихся на файл, хранится в ImageBlob;
+файл удаляется, когда ссылок не остаётся.
+"""
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+def _default_file_mode():
+    """Права нового файла, как у open(): 0o666 за вычетом umask"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+
+    def get_available_name(self, name, max_length=None):
+        # Имя определяется содержимым в _save, одинаковые файлы совпадают
+        return name
+
+    def _save(self, name, content):
+        directory = posixpath.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        os.makedirs(self.path(directory), exist_ok=True)
+        digest = hashlib.sha256()
+        descriptor, temp_path = tempfile.mkstemp(
+            dir=self.path(directory), suffix='.upload'
+        )
+        try:
+            with os.fdopen(descriptor, 'wb') as temp_file:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+            hexdigest = digest.hexdigest()
+            name = posixpath.join(
+                directory, hexdigest[:2], f'{hexdigest}{extension}'
+            )
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                return name
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            # mkstemp создаёт файл с правами 0600, а картинки должен
+            # читать и веб-сервер, запущенный другим пользователем
+            mode = self.file_permissions_mode
+            os.chmod(
+                temp_path, _default_file_mode() if mode is None else mode
+            )
+            os.replace(temp_path, full_path)
+            return name
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
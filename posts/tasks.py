@@ -0,0 +1,46 @@
+"""Фоновые задачи постов: побочные эффекты публикации и подписки"""
+from tasks.queue import task
+
+from . import thumbnails, timeline
+from .models import Post
+from .search import get_backend as get_search_backend
+
+
+@task()
+def fan_out_post(post_id):
+    """Раскладывает пост по лентам подписчиков автора"""
+    post = Post.objects.filter(pk=post_id).only(
+        'id', 'author_id', 'pub_date'
+    ).first()
+    if post is not None:
+        timeline.push_post(post)
+
+
+@task()
+def backfill_timeline(user_id, author_id):
+    timeline.backfill(user_id, author_id)
+
+
+@task()
+def remove_author_from_timeline(user_id, author_id):
+    timeline.remove_author(user_id, author_id)
+
+
+@task()
+def index_posts(post_ids):
+    """Обновляет поисковый индекс постов, удалённые убирает из него"""
+    backend = get_search_backend()
+    posts = Post.objects.filter(id__in=post_ids)
+    backend.reindex_posts(posts)
+    for post_id in set(post_ids) - set(posts.values_list('id', flat=True)):
+        backend.remove_post(post_id)
+
+
+@task()
+def index_group_posts(group_id):
+    get_search_backend().reindex_posts(Post.objects.filter(group_id=group_id))
+
+
+@task(max_attempts=3, backoff=30)
+def prepare_post_images(post_id):
+    thumbnails.prepare_post_images(post_id)
@@ -0,0 +1,54 @@
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+
+from posts.caching import get_or_compute
+
+register = template.Library()
+
+
+class FlightCacheNode(template.Node):
+    def __init__(self, nodelist, timeout, fragment_name, vary_on, version):
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+        self.version = version
+
+    def render(self, context):
+        timeout = int(self.timeout.resolve(context))
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        version = self.version.resolve(context) if self.version else None
+        return get_or_compute(
+            make_template_fragment_key(self.fragment_name, vary_on),
+            lambda: self.nodelist.render(context),
+            timeout,
+            version,
+        )
+
+
+@register.tag('flightcache')
+def do_flightcache(parser, token):
+    """Кеширует фрагмент шаблона с защитой от одновременного пересчёта.
+
+    {% flightcache [timeout] [fragment_name] [var1] .. version=[var] %}
+    Фрагмент с другой версией считается устаревшим: его пересчитывает
+    один запрос, остальные пока получают прежний HTML.
+    """
+    nodelist = parser.parse(('endflightcache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            f'{tokens[0]!r} tag requires at least 2 arguments.'
+        )
+    version = None
+    if len(tokens) > 3 and tokens[-1].startswith('version='):
+        version = parser.compile_filter(tokens[-1][len('version='):])
+        tokens = tokens[:-1]
+    return FlightCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(t) for t in tokens[3:]],
+        version,
+    )
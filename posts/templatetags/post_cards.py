@@ -0,0 +1,11 @@
+from django import template
+
+from posts.cards import render_cards
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts, **extra):
+    """Карточки постов ленты: {% post_cards page hide_group=True %}"""
+    return render_cards(context, list(posts), **extra)
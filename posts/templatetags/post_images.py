@@ -0,0 +1,37 @@
+from django import template
+
+from posts.thumbnails import cached_thumbnail
+
+register = template.Library()
+
+
+@register.simple_tag
+def thumbnail_url(image, geometry, **options):
+    """URL готовой миниатюры; пока её нет — URL исходной картинки"""
+    if not image:
+        return ''
+    thumbnail = cached_thumbnail(image, geometry, **options)
+    if thumbnail:
+        return thumbnail.url
+    return image.url
+
+
+@register.inclusion_tag('post_picture.html')
+def post_picture(post):
+    """Картинка поста с srcset по готовым вариантам"""
+    srcsets = {}
+    fallback = None
+    for variant in post.image_variants.all():
+        srcsets.setdefault(variant.format, []).append(
+            f'{variant.url} {variant.width}w'
+        )
+        if variant.format != 'webp':
+            fallback = variant
+    return {
+        'post': post,
+        'webp_srcset': ', '.join(srcsets.pop('webp', [])),
+        'srcset': ', '.join(
+            entry for entries in srcsets.values() for entry in entries
+        ),
+        'fallback': fallback,
+    }
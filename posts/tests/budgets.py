@@ -0,0 +1,20 @@
+"""Бюджеты запросов к базе для страниц, по имени маршрута.
+
+Бюджет не зависит от числа постов на странице: тесты проверяют его
+при разных размерах страницы (DATA_SIZES), поэтому запрос на каждый
+пост или комментарий в шаблоне сразу выводит страницу за бюджет.
+В бюджет входят сессия, пользователь, варианты картинок, поколения
+областей кеша и валидаторы условного ответа. Ленте подписок нужны ещё
+список подтягиваемых авторов и ключи страницы (posts/timeline.py).
+"""
+
+DATA_SIZES = (1, 10, 100)
+
+QUERY_BUDGETS = {
+    'posts:index': 5,
+    'posts:group': 7,
+    'posts:profile': 8,
+    'posts:follow_index': 6,
+    'posts:post': 7,
+    'posts:search': 5,
+}
@@ -0,0 +1,12 @@
+from django.test.runner import DiscoverRunner
+
+from posts.tests.utils import format_offenders
+
+
+class QueryBudgetRunner(DiscoverRunner):
+    """Тест-раннер, который после прогона печатает отчёт о бюджетах"""
+
+    def suite_result(self, suite, result, **kwargs):
+        for line in format_offenders():
+            print(line)
+        return super().suite_result(suite, result, **kwargs)
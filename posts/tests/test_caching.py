@@ -0,0 +1,95 @@
+import threading
+import time
+
+from django.core.cache import cache
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from posts import caching
+from posts.models import CacheScope, Post, User
+
+KEY = 'test:single-flight'
+INDEX_URL = reverse('posts:index')
+
+
+@override_settings(CACHE_EARLY_EXPIRY_BETA=0)
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_misses_compute_once(self):
+        """Одновременные промахи пересчитывают значение один раз"""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'value'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                caching.get_or_compute(KEY, compute, 60)
+            ))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['value'] * 5)
+
+    def test_stale_value_is_served_while_recomputing(self):
+        """Пока значение пересчитывается, отдаётся устаревшее"""
+        caching.get_or_compute(KEY, lambda: 'old', 60, version=1)
+        token = caching._acquire(KEY)
+        self.assertEqual(
+            caching.get_or_compute(KEY, lambda: 'new', 60, version=2),
+            'old'
+        )
+        caching._release(KEY, token)
+        self.assertEqual(
+            caching.get_or_compute(KEY, lambda: 'new', 60, version=2),
+            'new'
+        )
+
+    @override_settings(CACHE_EARLY_EXPIRY_BETA=10 ** 9)
+    def test_value_is_recomputed_early(self):
+        """При большом beta значение пересчитывается до истечения срока"""
+        def slow():
+            time.sleep(0.01)
+            return 'first'
+
+        caching.get_or_compute(KEY, slow, 60)
+        self.assertEqual(
+            caching.get_or_compute(KEY, lambda: 'second', 60),
+            'second'
+        )
+
+
+class ScopeGenerationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_generations_live_in_database(self):
+        """Поколения областей не теряются вместе с кешем процесса"""
+        caching.bump(caching.INDEX)
+        version = caching.version(caching.INDEX)
+        cache.clear()
+        self.assertEqual(caching.version(caching.INDEX), version)
+
+    def test_bump_from_another_process_resets_cached_page(self):
+        """Изменение, записанное другим процессом, сбрасывает страницу
+        в кеше этого процесса"""
+        user = User.objects.create(username='test_user')
+        post = Post.objects.create(text='Старый текст', author=user)
+        self.assertContains(self.client.get(INDEX_URL), 'Старый текст')
+        # Другой процесс правит пост и увеличивает поколение в базе,
+        # не трогая кеш этого процесса
+        Post.objects.filter(pk=post.pk).update(text='Новый текст')
+        CacheScope.objects.filter(name=caching.INDEX).update(
+            generation=F('generation') + 1
+        )
+        self.assertContains(self.client.get(INDEX_URL), 'Новый текст')
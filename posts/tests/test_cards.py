@@ -0,0 +1,88 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+
+from posts.cards import CARD_HOLE, CARD_KEY, card_version
+from posts.models import Comment, Group, Post, User
+from posts.queries import feed_queryset
+
+USERNAME = 'test_user'
+READER = 'test_reader'
+SLUG = 'test_slug'
+CARDS = Template('{% load post_cards %}{% post_cards posts %}')
+
+
+class PostCardsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username=USERNAME)
+        cls.reader = User.objects.create(username=READER)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug=SLUG,
+            description='Группа для тестирования',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост',
+            author=cls.user,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def render(self, user):
+        posts = feed_queryset(Post.objects.all())
+        return CARDS.render(Context({'posts': posts, 'user': user}))
+
+    def test_cards_render_every_post(self):
+        """Карточки выводятся для каждого поста ленты"""
+        Post.objects.create(text='Второй пост', author=self.reader)
+        html = self.render(AnonymousUser())
+        self.assertIn('Тестовый пост', html)
+        self.assertIn('Второй пост', html)
+        self.assertIn(f'#{self.group.title}', html)
+
+    @override_settings(POST_CARD_CACHE=True)
+    def test_unchanged_card_is_taken_from_cache(self):
+        """Неизменившаяся карточка берётся из кеша без рендера"""
+        self.render(self.reader)
+        post = feed_queryset(Post.objects.all()).get()
+        key = CARD_KEY.format(post.pk, card_version(post))
+        self.assertIsNotNone(cache.get(key))
+        cache.set(key, 'Из кеша')
+        self.assertEqual(self.render(self.reader), 'Из кеша')
+
+    @override_settings(POST_CARD_CACHE=True)
+    def test_edited_post_gets_new_card(self):
+        """После правки поста карточка рендерится заново"""
+        self.render(self.reader)
+        Post.objects.filter(pk=self.post.pk).update(text='Новый текст')
+        self.assertIn('Новый текст', self.render(self.reader))
+
+    @override_settings(POST_CARD_CACHE=True)
+    def test_comment_and_group_change_card(self):
+        """Новый комментарий и правка группы обновляют карточку"""
+        self.render(self.reader)
+        Comment.objects.create(post=self.post, author=self.reader, text='Да')
+        self.assertIn('Комментариев: 1', self.render(self.reader))
+        Group.objects.filter(pk=self.group.pk).update(title='Новая группа')
+        self.assertIn('#Новая группа', self.render(self.reader))
+
+    @override_settings(POST_CARD_CACHE=True)
+    def test_viewer_buttons_are_filled_after_cache(self):
+        """Одна карточка в кеше, кнопки дорисовываются для читателя"""
+        self.assertIn('Редактировать', self.render(self.user))
+        post = feed_queryset(Post.objects.all()).get()
+        key = CARD_KEY.format(post.pk, card_version(post))
+        self.assertNotIn('Редактировать', cache.get(key))
+        cache.set(key, f'Из кеша {CARD_HOLE}')
+        html = self.render(self.reader)
+        self.assertIn('Из кеша', html)
+        self.assertIn('Добавить комментарий', html)
+        self.assertNotIn('Редактировать', html)
+        html = self.render(AnonymousUser())
+        self.assertIn('Из кеша', html)
+        self.assertIn('Смотреть комментарии', html)
@@ -0,0 +1,87 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post, User
+from posts.paginator import encode_cursor
+
+USERNAME = 'test_user'
+READER = 'test_reader'
+
+
+@override_settings(COMMENTS_PER_PAGE=3)
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username=USERNAME)
+        cls.reader = User.objects.create(username=READER)
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.user)
+        cls.comments = [
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text=f'Комментарий {num}'
+            )
+            for num in range(7)
+        ]
+        cls.POST_URL = reverse('posts:post', args=[USERNAME, cls.post.id])
+        cls.COMMENTS_URL = reverse(
+            'posts:comments', args=[USERNAME, cls.post.id]
+        )
+
+    def test_post_page_shows_newest_comments(self):
+        """Страница поста выводит только первую порцию новых комментариев"""
+        response = self.client.get(self.POST_URL)
+        self.assertEqual(
+            list(response.context['comments']), self.comments[:-4:-1]
+        )
+        self.assertContains(
+            response, f'?after={response.context["next_cursor"]}'
+        )
+
+    def test_fragment_loads_remaining_comments(self):
+        """Фрагмент по курсору отдаёт следующие комментарии без повторов"""
+        loaded = []
+        cursor = None
+        while True:
+            if cursor is None:
+                response = self.client.get(self.POST_URL)
+            else:
+                response = self.client.get(
+                    self.COMMENTS_URL, {'after': cursor}
+                )
+                self.assertTemplateNotUsed(response, 'base.html')
+            loaded += list(response.context['comments'])
+            cursor = response.context['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(loaded, self.comments[::-1])
+        self.assertNotContains(response, 'js-more-comments')
+
+    def test_comment_shows_its_author(self):
+        """У комментария подписан его автор, а не автор поста"""
+        response = self.client.get(self.POST_URL)
+        self.assertContains(response, f'@{READER}')
+
+    def test_fragment_of_missing_post_is_not_found(self):
+        """Фрагмент комментариев несуществующего поста отвечает 404"""
+        response = self.client.get(
+            reverse('posts:comments', args=[USERNAME, self.post.id + 1])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_fragment_with_broken_cursor_starts_over(self):
+        """Битый или подделанный курсор фрагмента отдаёт первую порцию"""
+        for cursor in (
+            'broken',
+            encode_cursor(['2020-13-45T00:00:00', 1]),
+            encode_cursor(['2020-01-01T00:00:00', 'abc']),
+            encode_cursor(['2020-01-01T00:00:00', [1]]),
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(
+                    self.COMMENTS_URL, {'after': cursor}
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    list(response.context['comments']),
+                    self.comments[:-4:-1],
+                )
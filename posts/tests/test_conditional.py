@@ -0,0 +1,106 @@
+from django.core.cache import cache
+from django.db.models import F
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils.http import http_date
+
+from posts import caching
+from posts.models import CacheScope, Comment, Group, Post, User
+
+USERNAME = 'test_user'
+SLUG = 'test_slug'
+GROUP_URL = reverse('posts:group', args=[SLUG])
+PROFILE_URL = reverse('posts:profile', args=[USERNAME])
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username=USERNAME)
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug=SLUG, description='Группа'
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост', author=cls.user, group=cls.group
+        )
+        cls.POST_URL = reverse('posts:post', args=[USERNAME, cls.post.id])
+
+    def setUp(self):
+        cache.clear()
+        self.guest = Client()
+
+    def test_unchanged_pages_are_not_modified(self):
+        """Повторный запрос неизменной страницы получает 304 без тела"""
+        for url in (GROUP_URL, PROFILE_URL, self.POST_URL):
+            with self.subTest(url=url):
+                response = self.guest.get(url)
+                self.assertTrue(response.has_header('Last-Modified'))
+                etag = response['ETag']
+                response = self.guest.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+                response = self.guest.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                )
+                self.assertEqual(response.status_code, 304)
+
+    def test_not_modified_skips_page_queries(self):
+        """Ответ 304 обходится одним запросом валидаторов"""
+        etag = self.guest.get(self.POST_URL)['ETag']
+        with self.assertNumQueries(1):
+            response = self.guest.get(self.POST_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_reset_validators(self):
+        """Новый комментарий или правка поста меняют ETag страниц"""
+        etags = {
+            url: self.guest.get(url)['ETag']
+            for url in (GROUP_URL, PROFILE_URL, self.POST_URL)
+        }
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий'
+        )
+        self.post.text = 'Новый текст'
+        self.post.save()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_validators_do_not_depend_on_local_cache(self):
+        """Валидаторы читаются из базы: кеш процесса на них не влияет,
+        а изменение из другого процесса их сбрасывает"""
+        for url in (GROUP_URL, PROFILE_URL, self.POST_URL):
+            with self.subTest(url=url):
+                etag = self.guest.get(url)['ETag']
+                cache.clear()
+                response = self.guest.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                CacheScope.objects.filter(name=caching.GROUPS).update(
+                    generation=F('generation') + 1
+                )
+                response = self.guest.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_old_if_modified_since_gets_page(self):
+        """Клиент с устаревшей датой получает страницу целиком"""
+        response = self.guest.get(
+            self.POST_URL, HTTP_IF_MODIFIED_SINCE=http_date(0)
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_viewers_get_different_etags(self):
+        """ETag зависит от зрителя, потому что страница у каждого своя"""
+        reader = Client()
+        reader.force_login(User.objects.create(username='reader'))
+        self.assertNotEqual(
+            self.guest.get(PROFILE_URL)['ETag'],
+            reader.get(PROFILE_URL)['ETag'],
+        )
+
+    def test_missing_page_is_not_found(self):
+        """Для несуществующей страницы валидаторов нет"""
+        response = self.guest.get(reverse('posts:group', args=['missing']))
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
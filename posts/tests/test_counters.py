@@ -0,0 +1,77 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+
+from posts.models import Comment, Follow, Post, User, UserStats
+
+USERNAME = 'test_user'
+AUTHOR_1 = 'test_author'
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username=USERNAME)
+        cls.author = User.objects.create(username=AUTHOR_1)
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_post_counter(self):
+        """Счётчик записей растёт при публикации и падает при удалении"""
+        post = Post.objects.create(text='Пост', author=self.author)
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        post.delete()
+        self.assertEqual(self.stats(self.author).posts_count, 0)
+
+    def test_comment_counter(self):
+        """Счётчик комментариев поста следует за комментариями"""
+        post = Post.objects.create(text='Пост', author=self.author)
+        comment = Comment.objects.create(
+            post=post, author=self.user, text='Комментарий'
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+
+    def test_follow_counters(self):
+        """Подписка меняет счётчики подписчиков и подписок"""
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.user).following_count, 1)
+        follow.delete()
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.user).following_count, 0)
+
+    def test_recount_fixes_drift(self):
+        """Команда recount восстанавливает разошедшиеся счётчики"""
+        post = Post.objects.create(text='Пост', author=self.author)
+        Comment.objects.create(post=post, author=self.user, text='Текст')
+        UserStats.objects.filter(user=self.author).update(posts_count=42)
+        Post.objects.filter(pk=post.pk).update(comments_count=0)
+        UserStats.objects.filter(user=self.user).delete()
+        call_command('recount', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(post.comments_count, 1)
+        self.assertTrue(UserStats.objects.filter(user=self.user).exists())
+
+
+class CountersCascadeTests(TransactionTestCase):
+    def test_delete_user_with_mutual_follows(self):
+        """Удаление пользователя с подписками в обе стороны не ломает
+        счётчики оставшихся"""
+        user = User.objects.create(username=USERNAME)
+        author = User.objects.create(username=AUTHOR_1)
+        Follow.objects.create(user=user, author=author)
+        Follow.objects.create(user=author, author=user)
+        Post.objects.create(text='Пост', author=user)
+        user.delete()
+        stats = UserStats.objects.get(user=author)
+        self.assertEqual(stats.followers_count, 0)
+        self.assertEqual(stats.following_count, 0)
+        self.assertFalse(UserStats.objects.filter(user_id=user.pk).exists())
@@ -0,0 +1,53 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from posts.explain import is_full_scan
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ExplainViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-group', description='Группа'
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=cls.author, group=cls.group)
+            for number in range(20)
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Comment.objects.create(
+            post=Post.objects.first(), author=cls.reader, text='Комментарий'
+        )
+
+    def test_views_do_not_scan_tables(self):
+        """Запросы страниц ленты читают таблицы по индексам"""
+        out = StringIO()
+        call_command('explain_views', '--fail', stdout=out)
+        self.assertIn('Полных просмотров: 0', out.getvalue())
+        self.assertIn('post_author_pub_date_idx', out.getvalue())
+        self.assertIn(
+            'COVERING INDEX timeline_user_feed_idx', out.getvalue()
+        )
+
+    def test_full_scan_detection(self):
+        """Полным просмотром считается только чтение таблицы без индекса"""
+        self.assertTrue(is_full_scan('SCAN posts_post'))
+        self.assertTrue(is_full_scan('Seq Scan on posts_post'))
+        self.assertFalse(is_full_scan(
+            'SCAN posts_post USING INDEX post_pub_date_idx'
+        ))
+        self.assertFalse(is_full_scan('SEARCH posts_follow USING INDEX x'))
+
+    def test_follow_is_unique(self):
+        """Повторная подписка на автора не создаётся"""
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=self.reader, author=self.author)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=self.author, author=self.author)
@@ -0,0 +1,118 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from posts.models import Group, Post, User
+
+USERNAME = 'test_user'
+OTHER = 'test_other'
+SLUG = 'test_slug'
+INDEX_RSS_URL = reverse('posts:index_rss')
+INDEX_ATOM_URL = reverse('posts:index_atom')
+GROUP_RSS_URL = reverse('posts:group_rss', args=[SLUG])
+PROFILE_ATOM_URL = reverse('posts:profile_atom', args=[USERNAME])
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username=USERNAME)
+        cls.other = User.objects.create(username=OTHER)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug=SLUG,
+            description='Группа для тестирования',
+        )
+        cls.old_post = Post.objects.create(
+            text='Старый пост в группе',
+            author=cls.user,
+            group=cls.group,
+        )
+        Post.objects.filter(pk=cls.old_post.pk).update(
+            pub_date=timezone.now() - timezone.timedelta(days=2)
+        )
+        cls.new_post = Post.objects.create(
+            text='Новый пост другого автора',
+            author=cls.other,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_list_posts_of_their_scope(self):
+        """Ленты RSS и Atom выводят посты своей области"""
+        cases = (
+            (INDEX_RSS_URL, 'application/rss+xml',
+             [self.old_post, self.new_post], []),
+            (INDEX_ATOM_URL, 'application/atom+xml',
+             [self.old_post, self.new_post], []),
+            (GROUP_RSS_URL, 'application/rss+xml',
+             [self.old_post], [self.new_post]),
+            (PROFILE_ATOM_URL, 'application/atom+xml',
+             [self.old_post], [self.new_post]),
+        )
+        for url, content_type, present, absent in cases:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(
+                    response['Content-Type'].startswith(content_type)
+                )
+                for post in present:
+                    self.assertContains(response, post.text)
+                for post in absent:
+                    self.assertNotContains(response, post.text)
+
+    def test_feed_names_do_not_shadow_profiles(self):
+        """Пользователи rss и atom видят свои профили, а не ленты"""
+        for username in ('rss', 'atom'):
+            with self.subTest(username=username):
+                User.objects.create(username=username)
+                response = self.client.get(
+                    reverse('posts:profile', args=[username])
+                )
+                self.assertTemplateUsed(response, 'profile.html')
+
+    def test_missing_group_feed_is_not_found(self):
+        """Лента несуществующей группы отвечает 404"""
+        response = self.client.get(reverse('posts:group_rss', args=['nope']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_unchanged_feed_is_not_modified(self):
+        """Неизменившаяся лента отвечает 304 по ETag и Last-Modified"""
+        response = self.client.get(INDEX_RSS_URL)
+        self.assertEqual(
+            self.client.get(
+                INDEX_RSS_URL, HTTP_IF_NONE_MATCH=response['ETag']
+            ).status_code,
+            304,
+        )
+        self.assertEqual(
+            self.client.get(
+                INDEX_RSS_URL,
+                HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+            ).status_code,
+            304,
+        )
+
+    def test_modified_since_returns_only_newer_posts(self):
+        """С If-Modified-Since сериализуются только новые записи"""
+        since = timezone.now() - timezone.timedelta(days=1)
+        response = self.client.get(
+            INDEX_RSS_URL, HTTP_IF_MODIFIED_SINCE=http_date(since.timestamp())
+        )
+        self.assertContains(response, self.new_post.text)
+        self.assertNotContains(response, self.old_post.text)
+        self.assertIn('If-Modified-Since', response['Vary'])
+
+    def test_new_post_invalidates_cached_feed(self):
+        """Новый пост сразу появляется в закешированной ленте"""
+        self.client.get(GROUP_RSS_URL)
+        Post.objects.create(
+            text='Совсем новый пост', author=self.user, group=self.group
+        )
+        self.assertContains(
+            self.client.get(GROUP_RSS_URL), 'Совсем новый пост'
+        )
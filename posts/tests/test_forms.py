@@ -1,3 +1,4 @@
+import hashlib
 import shutil
 import tempfile
 from django import forms
@@ -104,7 +105,11 @@ class PostFormTests(TestCase):
         self.assertEqual(last_post.group.id, form_data['group'])
         self.assertEqual(last_post.author.username, self.user.username)
         image_data = form_data['image']
-        self.assertEqual(last_post.image.name, f'posts/{image_data.name}')
+        image_data.seek(0)
+        digest = hashlib.sha256(image_data.read()).hexdigest()
+        self.assertEqual(
+            last_post.image.name, f'posts/{digest[:2]}/{digest}.gif'
+        )
 
     def test_edit_post(self):
         """При редактировании поста, изменяется запись в базе данных."""
@@ -0,0 +1,95 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+from yatube.metrics import CONTENT_TYPE, REGISTRY
+
+INDEX_URL = reverse('posts:index')
+METRICS_URL = reverse('metrics')
+INDEX_COUNT = re.compile(
+    r'yatube_request_duration_seconds_count\{method="GET",status="2xx",'
+    r'view="posts:index"\} (\d+)'
+)
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test_user')
+        Post.objects.create(text='Тестовый пост', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        REGISTRY.reset()
+
+    def index_count(self):
+        content = self.client.get(METRICS_URL).content.decode()
+        return int(INDEX_COUNT.search(content).group(1))
+
+    def test_views_are_measured(self):
+        """Запросы к view попадают в гистограмму и счётчики"""
+        self.client.get(INDEX_URL)
+        self.client.get(INDEX_URL)
+        response = self.client.get(METRICS_URL)
+        content = response.content.decode()
+        self.assertEqual(response['Content-Type'], CONTENT_TYPE)
+        self.assertEqual(self.index_count(), 2)
+        self.assertIn('yatube_cache_requests_total{result="hit"}', content)
+        self.assertIn('yatube_db_queries_total{view="posts:index"}', content)
+        self.assertIn('yatube_task_queue_depth{status="queued"} 0.0', content)
+
+    def test_processes_are_aggregated(self):
+        """Значения других процессов из METRICS_DIR суммируются"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        with override_settings(METRICS_DIR=directory):
+            self.client.get(INDEX_URL)
+            with open(REGISTRY.path(), encoding='utf-8') as file:
+                values = json.load(file)
+            with open(os.path.join(directory, '1-0.json'), 'w',
+                      encoding='utf-8') as file:
+                json.dump(values, file)
+            self.assertEqual(self.index_count(), 2)
+
+    def test_dead_processes_are_archived(self):
+        """Значения завершившегося процесса остаются в сумме, а его файл
+        переносится в архив и не мешает новому процессу с тем же pid"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        dead_pid = os.getpid()
+        while True:
+            dead_pid += 1
+            try:
+                os.kill(dead_pid, 0)
+            except ProcessLookupError:
+                break
+            except OSError:
+                pass
+        with override_settings(METRICS_DIR=directory):
+            self.client.get(INDEX_URL)
+            with open(REGISTRY.path(), encoding='utf-8') as file:
+                values = json.load(file)
+            for started in (1, 2):
+                path = os.path.join(directory, f'{dead_pid}-{started}.json')
+                with open(path, 'w', encoding='utf-8') as file:
+                    json.dump(values, file)
+            self.assertEqual(self.index_count(), 3)
+            self.assertEqual(
+                sorted(name for name in os.listdir(directory)
+                       if name.endswith('.json')),
+                sorted(['archive.json', os.path.basename(REGISTRY.path())]),
+            )
+            self.assertEqual(self.index_count(), 3)
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.0.0.1'])
+    def test_metrics_are_hidden_from_other_addresses(self):
+        """Метрики недоступны с посторонних адресов"""
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 404)
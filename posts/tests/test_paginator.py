@@ -2,8 +2,12 @@ from django.test import TestCase
 from django.urls import reverse
 from django.conf import settings
 from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
 from posts.models import Post, Group, User
+from posts.paginator import CursorPaginator, encode_cursor
 
 USERNAME = 'test_user'
 SLUG = 'test_slug'
@@ -38,3 +42,69 @@ class PaginatorViewsTest(TestCase):
         self.assertTrue(
             posts_on_page <= settings.POSTS_PER_PAGE
         )
+
+    def test_cursor_pages_walk_the_whole_feed(self):
+        '''Курсоры ?after= и ?before= листают ленту без пропусков'''
+        cache.clear()
+        response = self.client.get(INDEX_URL)
+        cursor = response.context['cursor']
+        seen = [post.text for post in response.context['page']]
+        while cursor.has_next():
+            response = self.client.get(
+                INDEX_URL, {'after': cursor.next_cursor}
+            )
+            cursor = response.context['cursor']
+            seen += [post.text for post in response.context['page']]
+        self.assertEqual(seen, [str(num) for num in reversed(range(24))])
+        response = self.client.get(
+            INDEX_URL, {'before': cursor.previous_cursor}
+        )
+        self.assertEqual(
+            [post.text for post in response.context['page']],
+            [str(num) for num in range(13, 3, -1)]
+        )
+
+    def test_cursor_page_does_not_count_rows(self):
+        '''Курсорная страница выбирается без COUNT(*)'''
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        token = paginator.encode(Post.objects.first())
+        with CaptureQueriesContext(connection) as queries:
+            page = paginator.page(token)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('COUNT', queries[0]['sql'])
+        self.assertEqual(len(page), 10)
+
+    def test_broken_cursor_returns_first_page(self):
+        '''Битый токен курсора открывает первую страницу'''
+        cache.clear()
+        response = self.client.get(INDEX_URL, {'after': 'broken'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['page'][0].text, '23')
+
+    def test_malformed_cursor_values_return_first_page(self):
+        '''Токен с негодными значениями ключа открывает первую страницу'''
+        cache.clear()
+        for values in (
+            ['2020-13-45T00:00:00', 1],
+            ['2020-01-01T00:00:00', 'abc'],
+            ['2020-01-01T00:00:00', [1]],
+            [None, 1],
+            [{}, 1],
+        ):
+            with self.subTest(values=values):
+                for param in ('after', 'before'):
+                    response = self.client.get(
+                        INDEX_URL, {param: encode_cursor(values)}
+                    )
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(
+                        response.context['page'][0].text, '23'
+                    )
+
+    def test_naive_cursor_date_is_made_aware(self):
+        '''Дата без часового пояса в токене читается как UTC'''
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        pub_date, _ = paginator.decode(
+            encode_cursor(['2020-01-01T00:00:00', '5'])
+        )
+        self.assertFalse(timezone.is_naive(pub_date))
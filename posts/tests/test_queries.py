@@ -0,0 +1,87 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+from posts.tests.budgets import QUERY_BUDGETS
+from posts.tests.utils import at_data_sizes, query_budget
+
+USERNAME = 'test_user'
+READER = 'test_reader'
+SLUG = 'test_slug'
+FEED_URLS = {
+    'posts:index': reverse('posts:index'),
+    'posts:group': reverse('posts:group', args=[SLUG]),
+    'posts:profile': reverse('posts:profile', args=[USERNAME]),
+    'posts:follow_index': reverse('posts:follow_index'),
+    'posts:search': reverse('posts:search') + '?q=Пост',
+}
+
+
+class FeedQueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username=USERNAME)
+        cls.reader = User.objects.create(username=READER)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug=SLUG,
+            description='Группа для тестирования',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def create_posts(self, count):
+        for num in range(count):
+            post = Post.objects.create(
+                text=f'Пост {num}',
+                author=self.user,
+                group=self.group,
+            )
+            Comment.objects.create(post=post, author=self.reader, text='Да')
+        return post
+
+    def test_every_budgeted_page_is_tested(self):
+        """Для каждой страницы из таблицы бюджетов есть проверка"""
+        self.assertEqual(
+            set(QUERY_BUDGETS), set(FEED_URLS) | {'posts:post'}
+        )
+
+    @at_data_sizes()
+    def test_feed_pages_fit_query_budget(self, size):
+        """Страницы лент укладываются в бюджет при любом размере страницы"""
+        self.create_posts(size)
+        for url_name, url in FEED_URLS.items():
+            with self.subTest(url=url):
+                cache.clear()
+                with query_budget(url_name, size):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    @at_data_sizes()
+    def test_post_page_fits_query_budget(self, size):
+        """Страница поста укладывается в бюджет при любом числе комментариев"""
+        post = self.create_posts(1)
+        for num in range(size - 1):
+            Comment.objects.create(post=post, author=self.user, text=num)
+        with query_budget('posts:post', size):
+            response = self.client.get(
+                reverse('posts:post', args=[USERNAME, post.pk])
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        """Число запросов не растёт вместе с числом постов на странице"""
+        counts = []
+        for count in (1, 9):
+            self.create_posts(count)
+            cache.clear()
+            with query_budget('posts:index') as context:
+                self.client.get(FEED_URLS['posts:index'])
+            counts.append(len(context))
+        self.assertEqual(counts[0], counts[1])
@@ -0,0 +1,56 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+from yatube.routers import PIN_COOKIE, ReplicaRouter, reset
+
+USERNAME = 'test_user'
+INDEX_URL = reverse('posts:index')
+NEW_POST_URL = reverse('posts:new_post')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(TestCase):
+    """Основная база и реплика — два разных файла SQLite без репликации,
+    поэтому по содержимому страницы видно, из какой базы она прочитана"""
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username=USERNAME)
+
+    def setUp(self):
+        cache.clear()
+        self.author = Client()
+        self.author.force_login(self.user)
+        # Вход пользователя — тоже запись, она закрепила поток теста
+        reset()
+
+    def test_reads_go_to_replica(self):
+        """Чтения без записи обслуживает реплика"""
+        self.assertEqual(ReplicaRouter().db_for_read(Post), 'replica')
+        self.assertEqual(ReplicaRouter().db_for_write(Post), 'default')
+        self.assertEqual(ReplicaRouter().db_for_read(Post), 'default')
+
+    def test_author_sees_own_post_after_redirect(self):
+        """После публикации автор читает из основной базы"""
+        response = self.author.post(
+            NEW_POST_URL, {'text': 'Свежий пост'}, follow=True
+        )
+        self.assertIn(PIN_COOKIE, response.client.cookies)
+        self.assertContains(response, 'Свежий пост')
+        self.assertTrue(Post.objects.using('default').exists())
+
+    def test_other_readers_use_replica(self):
+        """Остальные читатели получают ленту из реплики"""
+        self.author.post(NEW_POST_URL, {'text': 'Свежий пост'})
+        response = Client().get(INDEX_URL)
+        self.assertNotContains(response, 'Свежий пост')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_is_primary(self):
+        """Без реплик все запросы идут в основную базу"""
+        self.assertEqual(ReplicaRouter().db_for_read(Post), 'default')
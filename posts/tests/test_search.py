@@ -0,0 +1,95 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.paginator import encode_cursor
+from posts.search import get_backend
+
+USERNAME = 'test_user'
+SLUG = 'test_slug'
+SEARCH_URL = reverse('posts:search')
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username=USERNAME)
+        cls.group = Group.objects.create(
+            title='Кулинария',
+            slug=SLUG,
+            description='Рецепты',
+        )
+        cls.post = Post.objects.create(
+            text='Рецепт борща <b>без</b> свёклы',
+            author=cls.user,
+        )
+        cls.group_post = Post.objects.create(
+            text='Пирог с яблоками',
+            author=cls.user,
+            group=cls.group,
+        )
+
+    def test_search_finds_post_with_highlight(self):
+        """Поиск находит пост и подсвечивает совпадение"""
+        response = self.client.get(SEARCH_URL, {'q': 'борщ'})
+        post, snippet = response.context['results'][0]
+        self.assertEqual(post, self.post)
+        self.assertIn('<mark>борща</mark>', snippet)
+        self.assertIn('&lt;b&gt;', snippet)
+
+    def test_search_by_group_title(self):
+        """Пост находится по названию своей группы"""
+        response = self.client.get(SEARCH_URL, {'q': 'кулинария'})
+        self.assertEqual(
+            [post for post, _ in response.context['results']],
+            [self.group_post]
+        )
+
+    def test_index_follows_edits_and_deletes(self):
+        """Индекс обновляется при изменении и удалении поста"""
+        backend = get_backend()
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Щи'
+        post.save()
+        self.assertEqual(backend.search_ids('борщ'), [])
+        self.assertEqual(backend.search_ids('щи'), [post.id])
+        post.delete()
+        self.assertEqual(backend.search_ids('щи'), [])
+
+    def test_search_pages_by_cursor(self):
+        """Результаты листаются курсором без повторов"""
+        for num in range(12):
+            Post.objects.create(text=f'Пирог номер {num}', author=self.user)
+        response = self.client.get(SEARCH_URL, {'q': 'пирог'})
+        first = [post.id for post, _ in response.context['results']]
+        response = self.client.get(SEARCH_URL, {
+            'q': 'пирог', 'after': response.context['next_cursor']
+        })
+        second = [post.id for post, _ in response.context['results']]
+        self.assertEqual(len(first) + len(second), 13)
+        self.assertFalse(set(first) & set(second))
+
+    def test_search_with_broken_cursor_starts_over(self):
+        """Битый или подделанный курсор поиска отдаёт первую страницу"""
+        expected = [
+            post.id for post, _ in
+            self.client.get(SEARCH_URL, {'q': 'пирог'}).context['results']
+        ]
+        for cursor in (
+            'broken',
+            encode_cursor([{}, 1]),
+            encode_cursor([1, {}]),
+            encode_cursor([1, 'abc']),
+            encode_cursor([True, 1]),
+            encode_cursor([1.5, 2.5]),
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(
+                    SEARCH_URL, {'q': 'пирог', 'after': cursor}
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    [post.id for post, _ in response.context['results']],
+                    expected,
+                )
@@ -0,0 +1,89 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.test import TestCase, override_settings
+
+from posts import seeding, transfer
+from posts.models import (
+    Comment, Follow, Group, Post, PostImageVariant, User, UserStats,
+)
+
+OPTIONS = dict(users=20, posts=50, groups=3, follows_per_user=3,
+               comments=80, image_ratio=0, seed=7)
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def clear():
+    for model in (Comment, Post, Follow, Group, User):
+        model.objects.all().delete()
+
+
+class SeedingTests(TestCase):
+    def test_seed_creates_requested_rows(self):
+        """Создаётся заданное число строк, даты постов идут по id"""
+        counts = seeding.seed(**OPTIONS)
+        self.assertEqual(counts['post'], Post.objects.count())
+        self.assertEqual(Post.objects.count(), OPTIONS['posts'])
+        self.assertEqual(Comment.objects.count(), OPTIONS['comments'])
+        self.assertFalse(Follow.objects.filter(user=F('author')).exists())
+        self.assertEqual(
+            list(Post.objects.order_by('pub_date').values_list('id')),
+            list(Post.objects.order_by('id').values_list('id')),
+        )
+        self.assertFalse(Comment.objects.filter(
+            created__lt=F('post__pub_date')).exists())
+        self.assertFalse(
+            Post.objects.filter(pub_date__gt=seeding.UNTIL).exists()
+        )
+
+    def test_seed_rebuilds_counters(self):
+        """После заполнения пересчитаны счётчики"""
+        seeding.seed(**OPTIONS)
+        stats = UserStats.objects.order_by('-followers_count').first()
+        self.assertEqual(
+            stats.followers_count,
+            Follow.objects.filter(author=stats.user_id).count(),
+        )
+        post = Post.objects.order_by('-comments_count').first()
+        self.assertEqual(post.comments_count, post.comments.count())
+
+    def test_seed_is_deterministic(self):
+        """При одинаковом seed данные совпадают вместе с id и датами"""
+        def snapshot():
+            seeding.seed(**OPTIONS)
+            records = list(transfer.export_records())
+            clear()
+            return records
+        self.assertEqual(snapshot(), snapshot())
+
+    def test_seed_refuses_filled_database(self):
+        """В непустую базу данные не пишутся"""
+        User.objects.create(username='existing')
+        with self.assertRaisesMessage(ValueError, 'user'):
+            seeding.seed(**OPTIONS)
+        self.assertEqual(User.objects.count(), 1)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class SeedingImagesTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_seed_prepares_variants(self):
+        """Каждый пост с картинкой получает все варианты"""
+        cache.clear()
+        counts = seeding.seed(**dict(OPTIONS, image_ratio=0.5, images=2))
+        per_post = (
+            len(settings.POST_IMAGE_WIDTHS) * len(settings.POST_IMAGE_FORMATS)
+        )
+        image_posts = Post.objects.exclude(image='').count()
+        self.assertTrue(image_posts)
+        self.assertEqual(counts['variant'], image_posts * per_post)
+        self.assertEqual(
+            PostImageVariant.objects.count(), image_posts * per_post
+        )
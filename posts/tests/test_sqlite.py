@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import User
+from yatube.sqlite import WriteLock
+
+USERNAME = 'test_user'
+AUTHOR = 'test_author'
+
+
+class SQLitePragmaTests(TestCase):
+    def test_connection_pragmas(self):
+        """Соединение получает прагмы рабочего режима"""
+        expected = {
+            'synchronous': 1,
+            'busy_timeout': settings.SQLITE_PRAGMAS['busy_timeout'],
+            'cache_size': settings.SQLITE_PRAGMAS['cache_size'],
+            'temp_store': 2,
+        }
+        with connection.cursor() as cursor:
+            for name, value in expected.items():
+                with self.subTest(pragma=name):
+                    cursor.execute(f'PRAGMA {name}')
+                    self.assertEqual(cursor.fetchone()[0], value)
+
+
+class WriteLockTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'write-lock')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_writers_wait_in_queue(self):
+        """Второй писатель ждёт, пока первый не отпустит блокировку"""
+        lock = WriteLock(self.path)
+        events = []
+
+        def write(name):
+            with lock:
+                events.append(f'{name}:start')
+                time.sleep(0.05)
+                events.append(f'{name}:end')
+
+        threads = [
+            threading.Thread(target=write, args=(name,))
+            for name in ('first', 'second')
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(
+            [event.split(':')[1] for event in events],
+            ['start', 'end', 'start', 'end'],
+        )
+
+    def test_lock_is_shared_through_file(self):
+        """Блокировка видна другим экземплярам через файл"""
+        first = WriteLock(self.path)
+        second = WriteLock(self.path, timeout=0.05)
+        with first:
+            self.assertFalse(second.acquire())
+        self.assertTrue(second.acquire())
+        second.release()
+
+
+class RecordingLock:
+    def __init__(self):
+        self.acquired = 0
+
+    def acquire(self):
+        self.acquired += 1
+        return True
+
+    def release(self):
+        pass
+
+
+class WriteQueueMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username=USERNAME)
+        cls.author = User.objects.create(username=AUTHOR)
+
+    def setUp(self):
+        self.lock = RecordingLock()
+        patcher = mock.patch('yatube.sqlite.get_write_lock',
+                             return_value=self.lock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reads_and_posts_without_writes_skip_queue(self):
+        """Чтения и POST без записей в базу не встают в очередь"""
+        self.client.get(reverse('posts:index'))
+        self.client.post(reverse('login'), {
+            'username': USERNAME, 'password': 'wrong',
+        })
+        self.assertEqual(self.lock.acquired, 0)
+
+    def test_writing_request_waits_once(self):
+        """Запрос, который пишет, встаёт в очередь один раз при любом
+        методе"""
+        self.client.force_login(self.user)
+        self.lock.acquired = 0
+        self.client.get(reverse('posts:profile_follow', args=[AUTHOR]))
+        self.assertEqual(self.lock.acquired, 1)
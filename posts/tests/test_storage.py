@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from posts.blobs import collect
+from posts.models import ImageBlob, Post, User
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+USERNAME = 'test_user'
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+def make_image(name='small.gif'):
+    return SimpleUploadedFile(name, SMALL_GIF, 'image/gif')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ContentAddressedStorageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username=USERNAME)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def create_post(self, name='small.gif'):
+        return Post.objects.create(
+            text='Пост с картинкой', author=self.user, image=make_image(name)
+        )
+
+    def test_same_image_is_stored_once(self):
+        """Одинаковые картинки сохраняются одним файлом"""
+        first = self.create_post('first.gif')
+        second = self.create_post('second.gif')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(ImageBlob.objects.get(name=first.image.name).refs, 2)
+        self.assertEqual(
+            os.listdir(os.path.dirname(first.image.path)),
+            [os.path.basename(first.image.name)],
+        )
+
+    def test_file_is_deleted_with_last_reference(self):
+        """Файл удаляется, когда на него не остаётся ссылок"""
+        first = self.create_post()
+        second = self.create_post()
+        name, path = first.image.name, first.image.path
+        first.delete()
+        collect(name)
+        self.assertTrue(os.path.exists(path))
+        second.delete()
+        collect(name)
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(ImageBlob.objects.filter(name=name).exists())
+
+    def test_replaced_image_releases_reference(self):
+        """Замена картинки освобождает ссылку на прежний файл"""
+        post = self.create_post()
+        name = post.image.name
+        post.image = SimpleUploadedFile(
+            'other.gif', SMALL_GIF + b'\x00', 'image/gif'
+        )
+        post.save()
+        self.assertNotEqual(post.image.name, name)
+        self.assertEqual(ImageBlob.objects.get(name=name).refs, 0)
+        self.assertEqual(ImageBlob.objects.get(name=post.image.name).refs, 1)
+
+    def test_stored_file_is_readable_by_others(self):
+        """Файл получает права, как у обычной загрузки, а не 0600"""
+        umask = os.umask(0o022)
+        try:
+            post = self.create_post()
+        finally:
+            os.umask(umask)
+        self.assertEqual(os.stat(post.image.path).st_mode & 0o777, 0o644)
+        with override_settings(FILE_UPLOAD_PERMISSIONS=0o640):
+            post.image = SimpleUploadedFile(
+                'other.gif', SMALL_GIF + b'\x01', 'image/gif'
+            )
+            post.save()
+            self.assertEqual(
+                os.stat(post.image.path).st_mode & 0o777, 0o640
+            )
@@ -0,0 +1,97 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post, PostImageVariant, User
+from posts.thumbnails import (
+    cached_thumbnail, prepare_post_images, render_thumbnails,
+)
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+USERNAME = 'test_user'
+INDEX_URL = reverse('posts:index')
+
+
+def make_image():
+    buffer = BytesIO()
+    Image.new('RGB', (1200, 600), 'red').save(buffer, 'PNG')
+    return SimpleUploadedFile('red.png', buffer.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username=USERNAME)
+        cls.post = Post.objects.create(
+            text='Пост с картинкой',
+            author=cls.user,
+            image=make_image(),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        # Хранилище ключей sorl-thumbnail читает записи через кеш,
+        # а строки в базе откатываются вместе с тестом
+        cache.clear()
+
+    def test_feed_does_not_render_thumbnails(self):
+        """Лента показывает исходную картинку, пока миниатюры нет"""
+        cache.clear()
+        response = self.client.get(INDEX_URL)
+        self.assertContains(response, self.post.image.url)
+        self.assertIsNone(cached_thumbnail(
+            self.post.image, '960x339', crop='center', upscale=True
+        ))
+
+    def test_rendered_thumbnail_is_used_by_feed(self):
+        """После фонового рендера лента берёт готовую миниатюру"""
+        self.assertEqual(render_thumbnails(self.post.image.name), 1)
+        thumbnail = cached_thumbnail(
+            self.post.image, '960x339', crop='center', upscale=True
+        )
+        self.assertEqual((thumbnail.width, thumbnail.height), (960, 339))
+        cache.clear()
+        self.assertContains(self.client.get(INDEX_URL), thumbnail.url)
+
+    def test_variants_are_rendered_into_srcset(self):
+        """Варианты картинки сохраняются и выводятся в srcset"""
+        prepare_post_images(self.post.id)
+        variants = PostImageVariant.objects.filter(post=self.post)
+        self.assertEqual(
+            sorted(variants.values_list('format', 'width', 'height')),
+            [('jpeg', 320, 113), ('jpeg', 640, 226), ('jpeg', 960, 339),
+             ('webp', 320, 113), ('webp', 640, 226), ('webp', 960, 339)]
+        )
+        self.assertTrue(all(variant.size for variant in variants))
+        cache.clear()
+        response = self.client.get(INDEX_URL)
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, 'width="960" height="339"')
+
+    def test_prepared_variants_reset_cached_pages(self):
+        """Готовые варианты сразу видны на закешированных страницах"""
+        cache.clear()
+        urls = (
+            INDEX_URL,
+            reverse('posts:profile', args=[USERNAME]),
+            reverse('posts:post', args=[USERNAME, self.post.id]),
+        )
+        for url in urls:
+            self.assertNotContains(self.client.get(url), 'srcset')
+        prepare_post_images(self.post.id)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'srcset')
@@ -0,0 +1,131 @@
+from django.db.models import Q
+from django.test import TestCase, override_settings
+
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry, User, UserStats
+
+USERNAME = 'test_reader'
+AUTHOR_1 = 'test_author'
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create(username=USERNAME)
+        cls.author = User.objects.create(username=AUTHOR_1)
+
+    def test_new_post_is_pushed_to_followers(self):
+        """Новый пост попадает в ленты подписчиков"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
+        self.assertIn(post, timeline.get_feed(self.reader))
+
+    def test_follow_backfills_and_unfollow_removes(self):
+        """Подписка заполняет ленту, отписка очищает её"""
+        post = Post.objects.create(text='Старый пост', author=self.author)
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertIn(post, timeline.get_feed(self.reader))
+        follow.delete()
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.reader).exists())
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_heavy_author_is_pulled(self):
+        """Посты тяжёлых авторов не раскладываются, но видны в ленте"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Пост звезды', author=self.author)
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.reader).exists())
+        self.assertIn(post, timeline.get_feed(self.reader))
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_unfollow_does_not_hide_pulled_posts(self):
+        """Пост, не разложенный по лентам, виден и после того, как автор
+        перестал быть тяжёлым, а следующий пост снова раскладывается"""
+        other = User.objects.create(username='other_reader')
+        Follow.objects.create(user=self.reader, author=self.author)
+        follow = Follow.objects.create(user=other, author=self.author)
+        pulled = Post.objects.create(text='Пост звезды', author=self.author)
+        self.assertIn(pulled, timeline.get_feed(self.reader))
+        follow.delete()
+        self.assertIn(pulled, timeline.get_feed(self.reader))
+        post = Post.objects.create(text='Обычный пост', author=self.author)
+        self.assertFalse(UserStats.objects.get(user=self.author).pulled)
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(
+                user=self.reader).values_list('post_id', flat=True)),
+            {pulled.id, post.id},
+        )
+
+    def test_feed_pages_merge_timeline_and_pulled_authors(self):
+        """Страницы ленты сливают записи ленты и посты подтягиваемых
+        авторов без повторов и пропусков в обе стороны"""
+        star = User.objects.create(username='star')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.reader, author=star)
+        for num in range(3):
+            Post.objects.create(text=f'Звезда {num}', author=star)
+        with override_settings(TIMELINE_FANOUT_LIMIT=0):
+            for num in range(3):
+                Post.objects.create(text=f'Автор {num}', author=self.author)
+                Post.objects.create(text=f'Звезда {num}', author=star)
+        expected = list(Post.objects.filter(
+            Q(author=self.author) | Q(author=star)
+        ).order_by('-pub_date', '-id'))
+        paginator = timeline.FeedPaginator(
+            Post.objects.all(), 5, user=self.reader
+        )
+        first = paginator.page()
+        second = paginator.page(after=first.next_cursor)
+        self.assertEqual(list(first) + list(second), expected)
+        self.assertFalse(second.has_next())
+        self.assertEqual(
+            list(paginator.page(before=second.previous_cursor)),
+            expected[:5],
+        )
+
+    @override_settings(TIMELINE_LENGTH=2)
+    def test_trim_keeps_latest_entries(self):
+        """Обрезка оставляет в ленте только последние записи"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        for num in range(4):
+            Post.objects.create(text=str(num), author=self.author)
+        timeline.trim(self.reader.id)
+        self.assertEqual(
+            list(TimelineEntry.objects.filter(
+                user=self.reader).values_list('post__text', flat=True)),
+            ['3', '2'],
+        )
+
+    @override_settings(TIMELINE_LENGTH=2)
+    def test_fan_out_trims_timelines(self):
+        """Раскладка нового поста сразу обрезает ленты подписчиков"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        for num in range(4):
+            Post.objects.create(text=str(num), author=self.author)
+        self.assertEqual(
+            list(TimelineEntry.objects.filter(
+                user=self.reader).values_list('post__text', flat=True)),
+            ['3', '2'],
+        )
+
+    @override_settings(TIMELINE_LENGTH=2)
+    def test_rebuild_restores_latest_entries(self):
+        """Пересборка заполняет ленту последними постами подписок"""
+        other = User.objects.create(username='other_author')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.reader, author=other)
+        for num in range(4):
+            author = other if num % 2 else self.author
+            Post.objects.create(text=str(num), author=author)
+        Post.objects.create(text='Чужой', author=self.reader)
+        TimelineEntry.objects.all().delete()
+        timeline.rebuild(self.reader.id)
+        self.assertEqual(
+            list(TimelineEntry.objects.filter(
+                user=self.reader).values_list('post__text', flat=True)),
+            ['3', '2'],
+        )
@@ -0,0 +1,63 @@
+import json
+import re
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+INDEX_URL = reverse('posts:index')
+
+
+class ServerTimingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test_user')
+        Post.objects.create(text='Тестовый пост', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def timing(self, response):
+        return dict(
+            (match.group(1), match.group(2))
+            for match in re.finditer(
+                r'(\w+);(?:dur=([\d.]+))?', response['Server-Timing']
+            )
+        )
+
+    def test_header_reports_request_metrics(self):
+        """Заголовок Server-Timing содержит базу, кеш, шаблоны и итог"""
+        response = self.client.get(INDEX_URL)
+        metrics = self.timing(response)
+        for name in ('db', 'cache', 'tpl', 'thumb', 'total'):
+            with self.subTest(metric=name):
+                self.assertIn(name, metrics)
+        self.assertGreater(float(metrics['tpl']), 0)
+        self.assertNotIn('miss=0', response['Server-Timing'])
+
+    def test_cached_page_is_a_hit(self):
+        """Повторный запрос страницы отмечается попаданием в кеш и читает
+        из базы только поколения областей"""
+        self.client.get(INDEX_URL)
+        response = self.client.get(INDEX_URL)
+        self.assertIn('hit=1', response['Server-Timing'])
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+
+    @override_settings(SLOW_REQUEST_MS=0, SLOW_REQUEST_SAMPLE_RATE=1)
+    def test_slow_request_is_logged_with_queries(self):
+        """Медленный запрос логируется вместе со списком SQL"""
+        with self.assertLogs('yatube.timing', 'WARNING') as logs:
+            self.client.get(INDEX_URL)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], INDEX_URL)
+        self.assertEqual(len(record['sql']), record['queries'])
+        self.assertTrue(record['sql'])
+
+    @override_settings(SERVER_TIMING_HEADER=False)
+    def test_header_can_be_disabled(self):
+        """Заголовок отключается настройкой"""
+        response = self.client.get(INDEX_URL)
+        self.assertFalse(response.has_header('Server-Timing'))
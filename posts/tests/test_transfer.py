@@ -0,0 +1,129 @@
+import json
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from posts import timeline
+from posts.models import (
+    Comment, Follow, Group, ImageBlob, Post, PostImageVariant, User,
+    UserStats,
+)
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+USERNAME = 'test_user'
+READER = 'test_reader'
+SLUG = 'test_slug'
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class TransferTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username=USERNAME)
+        cls.reader = User.objects.create(username=READER)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug=SLUG,
+            description='Группа для тестирования',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        cls.post = Post.objects.create(
+            text='Тестовый пост',
+            author=cls.user,
+            group=cls.group,
+            image='posts/ab/test.jpg',
+        )
+        Post.objects.filter(pk=cls.post.pk).update(
+            pub_date=timezone.now() - timezone.timedelta(days=3)
+        )
+        cls.post.refresh_from_db()
+        Comment.objects.create(post=cls.post, author=cls.reader, text='Да')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def export(self):
+        output = StringIO()
+        call_command('export_yatube', stdout=output, stderr=StringIO())
+        return output.getvalue()
+
+    def clear(self):
+        for model in (Comment, Post, Follow, Group, User):
+            model.objects.all().delete()
+        ImageBlob.objects.all().delete()
+
+    def test_export_writes_one_record_per_line(self):
+        """Выгрузка — по записи в строке, в порядке зависимостей"""
+        records = [json.loads(line) for line in self.export().splitlines()]
+        self.assertEqual(
+            [record['model'] for record in records],
+            ['user', 'user', 'group', 'follow', 'post', 'comment'],
+        )
+        self.assertEqual(records[4]['text'], 'Тестовый пост')
+
+    def test_import_restores_data_and_derived_rows(self):
+        """Загрузка восстанавливает данные, счётчики, ленты и картинки"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'dump.ndjson.gz')
+            call_command('export_yatube', path, stderr=StringIO())
+            self.clear()
+            call_command(
+                'import_yatube', path, batch_size=1, stderr=StringIO()
+            )
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.pub_date, self.post.pub_date)
+        self.assertEqual(post.group.slug, SLUG)
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(
+            UserStats.objects.get(user__username=USERNAME).followers_count, 1
+        )
+        reader = User.objects.get(username=READER)
+        self.assertIn(post, timeline.get_feed(reader))
+        self.assertEqual(ImageBlob.objects.get(name=post.image.name).refs, 1)
+
+    def test_import_into_filled_database_is_refused(self):
+        """Без --force загрузка в непустую базу ничего не пишет"""
+        dump = self.export()
+        Comment.objects.all().delete()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'dump.ndjson')
+            with open(path, 'w', encoding='utf-8') as stream:
+                stream.write(dump)
+            with self.assertRaisesMessage(CommandError, 'user, group'):
+                call_command('import_yatube', path, stderr=StringIO())
+        self.assertFalse(Comment.objects.exists())
+
+    def test_import_prepares_post_images(self):
+        """После загрузки у постов с картинками есть варианты"""
+        buffer = BytesIO()
+        Image.new('RGB', (1200, 600), 'red').save(buffer, 'JPEG')
+        name = self.post.image.storage.save(
+            'posts/red.jpg', ContentFile(buffer.getvalue())
+        )
+        Post.objects.filter(pk=self.post.pk).update(image=name)
+        dump = self.export()
+        self.clear()
+        cache.clear()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'dump.ndjson')
+            with open(path, 'w', encoding='utf-8') as stream:
+                stream.write(dump)
+            call_command('import_yatube', path, stderr=StringIO())
+        self.assertEqual(
+            PostImageVariant.objects.filter(post_id=self.post.pk).count(),
+            len(settings.POST_IMAGE_WIDTHS) * len(settings.POST_IMAGE_FORMATS),
+        )
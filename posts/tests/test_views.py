@@ -89,6 +89,9 @@ class PostPagesTests(TestCase):
         shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
         super().tearDownClass()
 
+    def setUp(self):
+        cache.clear()
+
     def test_pages_show_correct_context(self):
         """Страница сформирована с правильным контекстом"""
         cache.clear()
@@ -137,16 +140,33 @@ class PostPagesTests(TestCase):
 
     def test_cache_after_time(self):
         """Тест кеша страницы """
+        cache.clear()
         response_old = self.authorized_client.get(INDEX_URL)
+        response_cached = self.authorized_client.get(INDEX_URL)
+        self.assertEqual(response_old.content, response_cached.content)
+        self.assertIsNone(response_cached.context)
         Post.objects.create(
             text='abracadabra',
             author=self.user
         )
         response_new = self.authorized_client.get(INDEX_URL)
-        self.assertEqual(response_old.content, response_new.content)
+        self.assertNotEqual(response_old.content, response_new.content)
+        self.assertContains(response_new, 'abracadabra')
+
+    def test_cache_is_reset_after_edit(self):
+        """Изменение поста сразу видно на закешированных страницах"""
         cache.clear()
-        response_newest = self.authorized_client.get(INDEX_URL)
-        self.assertNotEqual(response_old.content, response_newest.content)
+        self.authorized_client.get(GROUP_URL)
+        self.authorized_client.post(
+            reverse('posts:post_edit', args=[USERNAME, self.post.id]),
+            {'text': 'Исправленный текст', 'group': self.group2.id},
+        )
+        self.assertContains(
+            self.authorized_client.get(GROUP_2_URL), 'Исправленный текст'
+        )
+        self.assertNotContains(
+            self.authorized_client.get(GROUP_URL), 'Исправленный текст'
+        )
 
     def test_user_can_follow_author(self):
         """Проверка возможности подписки"""
@@ -0,0 +1,83 @@
+from contextlib import contextmanager
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from posts.tests.budgets import DATA_SIZES, QUERY_BUDGETS
+
+# Замеры всех проверок бюджета за прогон:
+# (страница, размер страницы, запросов, бюджет)
+MEASUREMENTS = []
+
+
+@contextmanager
+def assert_query_budget(budget, using='default', label=None, size=None):
+    """Падает, если в блоке выполнено больше запросов, чем budget"""
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+    executed = len(context)
+    if label is not None:
+        MEASUREMENTS.append((label, size, executed, budget))
+    if executed > budget:
+        if size is not None:
+            label = f'{label} [{size}]'
+        queries = '\n'.join(
+            f'{num}. {query["sql"]}'
+            for num, query in enumerate(context.captured_queries, start=1)
+        )
+        raise AssertionError(
+            f'{label or "Блок"}: выполнено запросов: {executed}, '
+            f'бюджет: {budget}\n{queries}'
+        )
+
+
+def query_budget(url_name, size=None, using='default'):
+    """Проверка бюджета страницы url_name из таблицы QUERY_BUDGETS"""
+    return assert_query_budget(QUERY_BUDGETS[url_name], using, url_name, size)
+
+
+def at_data_sizes(sizes=DATA_SIZES):
+    """Запускает тест для каждого размера страницы из sizes.
+
+    Размер передаётся в тест аргументом и в POSTS_PER_PAGE. Данные,
+    созданные тестом для одного размера, откатываются перед следующим.
+    """
+    def decorator(test):
+        @wraps(test)
+        def wrapper(self, *args, **kwargs):
+            for size in sizes:
+                with self.subTest(size=size), \
+                        override_settings(POSTS_PER_PAGE=size):
+                    cache.clear()
+                    with transaction.atomic():
+                        test(self, size, *args, **kwargs)
+                        transaction.set_rollback(True)
+        return wrapper
+    return decorator
+
+
+def worst_offenders(limit=10):
+    """Самые дорогие страницы прогона по доле израсходованного бюджета"""
+    worst = {}
+    for label, size, executed, budget in MEASUREMENTS:
+        if label not in worst or executed > worst[label][1]:
+            worst[label] = (size, executed, budget)
+    return sorted(
+        ((label, *measurement) for label, measurement in worst.items()),
+        key=lambda item: (item[2] / max(item[3], 1), item[2]),
+        reverse=True,
+    )[:limit]
+
+
+def format_offenders(limit=10):
+    """Отчёт worst_offenders в виде строк для вывода после прогона"""
+    lines = [
+        f'{label:<24} {executed:>4} / {budget:<4} '
+        f'постов на странице: {size or "-"}'
+        for label, size, executed, budget in worst_offenders(limit)
+    ]
+    if lines:
+        lines.insert(0, 'Бюджеты запросов, самые дорогие страницы:')
+    return lines
@@ -0,0 +1,147 @@
+"""Фоновая подготовка миниатюр картинок постов.
+
+После сохранения поста с картинкой фоновая задача
+posts.tasks.prepare_post_images рендерит все геометрии из
+THUMBNAIL_GEOMETRIES и записывает их в хранилище ключей sorl-thumbnail.
+Там же готовятся варианты картинки разной ширины и формата для srcset,
+их размеры сохраняются в PostImageVariant. Шаблоны только читают
+готовые миниатюры и никогда не масштабируют и не открывают картинки
+во время запроса.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import connections, transaction
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+from yatube import metrics, timing
+
+from . import caching
+from .models import Post, PostImageVariant
+
+logger = logging.getLogger(__name__)
+
+
+def _init_worker():
+    # Соединения с базой, унаследованные от родителя, в дочернем
+    # процессе использовать нельзя
+    connections.close_all()
+
+
+def _full_options(source, options):
+    """Опции миниатюры с теми же значениями по умолчанию, что у sorl"""
+    backend = default.backend
+    options = dict(options)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    return options
+
+
+def cached_thumbnail(file_, geometry, **options):
+    """Готовая миниатюра из хранилища ключей или None, без рендера"""
+    if not file_:
+        return None
+    source = ImageFile(file_)
+    name = default.backend._get_thumbnail_filename(
+        source, geometry, _full_options(source, options)
+    )
+    return default.kvstore.get(ImageFile(name, default.storage))
+
+
+def source_file(name):
+    """Картинка поста в хранилище поля image или None, если её нет"""
+    storage = Post._meta.get_field('image').storage
+    try:
+        if storage.exists(name):
+            return ImageFile(name, storage)
+    except (SuspiciousFileOperation, OSError):
+        pass
+    return None
+
+
+def render_thumbnails(name):
+    """Рендерит все настроенные миниатюры картинки name"""
+    source = source_file(name)
+    if source is None:
+        return 0
+    rendered = 0
+    for geometry, options in settings.THUMBNAIL_GEOMETRIES:
+        try:
+            get_thumbnail(source, geometry, **options)
+            rendered += 1
+        except Exception:
+            logger.exception('Не удалось создать миниатюру %s', name)
+    return rendered
+
+
+def variant_geometry(width):
+    card_width, card_height = settings.POST_IMAGE_ASPECT
+    return f'{width}x{round(width * card_height / card_width)}'
+
+
+def render_variant_fields(name):
+    """Создаёт варианты картинки name и возвращает поля PostImageVariant"""
+    source = source_file(name)
+    fields = []
+    if source is None:
+        return fields
+    for image_format in settings.POST_IMAGE_FORMATS:
+        for width in settings.POST_IMAGE_WIDTHS:
+            try:
+                thumbnail = get_thumbnail(
+                    source, variant_geometry(width),
+                    crop='center', upscale=True, format=image_format,
+                )
+                fields.append({
+                    'format': image_format.lower(),
+                    'name': thumbnail.name,
+                    'url': thumbnail.url,
+                    'width': thumbnail.width,
+                    'height': thumbnail.height,
+                    'size': thumbnail.storage.size(thumbnail.name),
+                })
+            except Exception:
+                logger.exception('Не удалось создать вариант %s', name)
+    return fields
+
+
+def render_variants(post):
+    """Создаёт варианты картинки поста и сохраняет их размеры"""
+    fields = render_variant_fields(post.image.name) if post.image else []
+    variants = [PostImageVariant(post=post, **values) for values in fields]
+    with transaction.atomic():
+        post.image_variants.all().delete()
+        PostImageVariant.objects.bulk_create(variants)
+    return len(variants)
+
+
+def prepare_post_images(post_id):
+    """Миниатюры и варианты картинки поста.
+
+    Страницы и фрагменты, закешированные до готовности вариантов,
+    выводят картинку без srcset, поэтому области поста сбрасываются.
+    """
+    post = Post.objects.filter(pk=post_id).select_related('author').only(
+        'id', 'image', 'group_id', 'author__username'
+    ).first()
+    if post is None:
+        return 0
+    started = time.perf_counter()
+    with timing.measure('thumbnail'):
+        rendered = render_thumbnails(post.image.name) if post.image else 0
+        rendered += render_variants(post)
+    metrics.IMAGE_TIME.inc(time.perf_counter() - started)
+    metrics.IMAGES_PROCESSED.inc(rendered)
+    caching.bump(*caching.post_scopes(post, post.group_id))
+    return rendered
@@ -0,0 +1,234 @@
+"""Материализованная лента подписок (fan-out on write).
+
+При публикации поста его id раскладывается в ленты подписчиков автора,
+поэтому страница follow_index читает готовый упорядоченный список вместо
+соединения таблиц Follow и Post. Посты авторов с огромным числом
+подписчиков не раскладываются, а подтягиваются при чтении. Таких авторов
+отмечает флаг UserStats.pulled, а не текущее число подписчиков: флаг
+снимается, только когда ленты всех подписчиков снова заполнены, поэтому
+отписка не прячет уже опубликованные посты.
+
+Страница ленты (FeedPaginator) не соединяет ленту с постами: ключи
+страницы читаются по индексу ленты и по индексу постов каждого
+подтягиваемого автора запросами с LIMIT и сливаются в Python.
+"""
+import heapq
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import IntegerField, Q, Value
+
+from .models import Follow, Post, TimelineEntry, UserStats
+from .paginator import CursorPaginator
+from .queries import feed_queryset
+
+BATCH_SIZE = 500
+
+
+def is_heavy_author(author_id):
+    """Автор с таким числом подписчиков читается напрямую, без раскладки"""
+    return UserStats.objects.filter(
+        user_id=author_id,
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).exists()
+
+
+def pull_author(author_id):
+    """Отмечает автора, чьи посты подтягиваются в ленты при чтении"""
+    UserStats.objects.filter(user_id=author_id, pulled=False).update(
+        pulled=True
+    )
+
+
+def pull_heavy_authors():
+    """Отмечает всех авторов с подписчиками сверх TIMELINE_FANOUT_LIMIT"""
+    return UserStats.objects.filter(
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT, pulled=False,
+    ).update(pulled=True)
+
+
+def pulled_authors(user):
+    """id авторов из подписок пользователя, чьи посты не раскладываются"""
+    return UserStats.objects.filter(
+        user__following__user=user,
+        pulled=True,
+    ).values('user_id')
+
+
+def release_author(author_id):
+    """Снова раскладывает посты автора, который перестал быть тяжёлым.
+
+    Пока флаг стоит, его посты подтягиваются при чтении, поэтому он
+    снимается только после заполнения лент всех подписчиков.
+    """
+    if not UserStats.objects.filter(user_id=author_id, pulled=True).exists():
+        return False
+    followers = Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True)
+    for user_id in followers.iterator():
+        fill(user_id, author_id)
+    UserStats.objects.filter(user_id=author_id).update(pulled=False)
+    return True
+
+
+def push_post(post):
+    """Добавляет новый пост в ленты всех подписчиков автора.
+
+    Каждая лента выросла на запись, поэтому сразу обрезается до
+    TIMELINE_LENGTH. Подписчиков не больше TIMELINE_FANOUT_LIMIT.
+    """
+    if is_heavy_author(post.author_id):
+        pull_author(post.author_id)
+        return
+    # Пост уже есть среди последних постов автора
+    if release_author(post.author_id):
+        return
+    followers = list(Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True))
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+         for user_id in followers),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    for user_id in followers:
+        trim(user_id)
+
+
+def fill(user_id, author_id):
+    """Добавляет в ленту последние посты автора"""
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'id', 'pub_date'
+    )[:settings.TIMELINE_LENGTH]
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+         for post_id, pub_date in posts),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    trim(user_id)
+
+
+def backfill(user_id, author_id):
+    """Заполняет ленту последними постами автора после подписки"""
+    if is_heavy_author(author_id):
+        pull_author(author_id)
+        return
+    fill(user_id, author_id)
+
+
+def remove_author(user_id, author_id):
+    """Убирает из ленты посты автора после отписки"""
+    TimelineEntry.objects.filter(
+        user_id=user_id,
+        post__author_id=author_id,
+    ).delete()
+
+
+def trim(user_id):
+    """Оставляет в ленте только TIMELINE_LENGTH последних записей"""
+    cutoff = TimelineEntry.objects.filter(user_id=user_id).values_list(
+        'pub_date', 'post_id'
+    )[settings.TIMELINE_LENGTH:settings.TIMELINE_LENGTH + 1]
+    if not cutoff:
+        return
+    pub_date, post_id = cutoff[0]
+    TimelineEntry.objects.filter(
+        Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, post_id__lte=post_id),
+        user_id=user_id,
+    ).delete()
+
+
+@transaction.atomic
+def rebuild(user_id):
+    """Пересобирает ленту пользователя с нуля одной транзакцией.
+
+    Последние TIMELINE_LENGTH постов всех авторов из подписок переносятся
+    в ленту одним INSERT ... SELECT, не проходя через Python.
+    """
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    posts = Post.objects.filter(
+        author__following__user_id=user_id
+    ).exclude(
+        author__in=pulled_authors(user_id)
+    ).annotate(
+        reader=Value(user_id, output_field=IntegerField())
+    ).order_by('-pub_date', '-id').values_list(
+        'id', 'pub_date', 'reader'
+    )[:settings.TIMELINE_LENGTH]
+    sql, params = posts.query.sql_with_params()
+    table = TimelineEntry._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (post_id, pub_date, user_id) {sql}', params
+        )
+
+
+def get_feed(user):
+    """Посты ленты подписок одним набором.
+
+    Страницы ленты читает FeedPaginator; набор нужен старым ссылкам
+    ?page=N и проверкам вхождения поста в ленту.
+    """
+    return Post.objects.filter(
+        Q(id__in=TimelineEntry.objects.filter(user=user).values('post_id'))
+        | Q(author__in=pulled_authors(user))
+    )
+
+
+def _seek(values, reverse, id_field):
+    """Условие «строго после ключа (pub_date, id)» в порядке ленты"""
+    if values is None:
+        return Q()
+    pub_date, post_id = values
+    lookup = 'gt' if reverse else 'lt'
+    return Q(**{f'pub_date__{lookup}': pub_date}) | Q(
+        pub_date=pub_date, **{f'{id_field}__{lookup}': post_id}
+    )
+
+
+def page_keys(user, limit, values=None, reverse=False):
+    """Ключи (pub_date, post_id) первых limit постов ленты после values"""
+    sign = '' if reverse else '-'
+    sources = [TimelineEntry.objects.filter(
+        _seek(values, reverse, 'post_id'), user=user,
+    ).order_by(f'{sign}pub_date', f'{sign}post_id').values_list(
+        'pub_date', 'post_id'
+    )]
+    for author_id in pulled_authors(user).values_list('user_id', flat=True):
+        sources.append(Post.objects.filter(
+            _seek(values, reverse, 'id'), author_id=author_id,
+        ).order_by(f'{sign}pub_date', f'{sign}id').values_list(
+            'pub_date', 'id'
+        ))
+    keys, seen = [], set()
+    # Посты тяжёлого автора могли остаться в ленте с тех пор, когда
+    # он раскладывался, поэтому повторы пропускаются
+    for key in heapq.merge(*(list(source[:limit]) for source in sources),
+                           reverse=not reverse):
+        if key[1] not in seen:
+            seen.add(key[1])
+            keys.append(key)
+            if len(keys) == limit:
+                break
+    return keys
+
+
+class FeedPaginator(CursorPaginator):
+    """Курсорный пагинатор ленты подписок пользователя user"""
+
+    def __init__(self, queryset, per_page, ordering=('-pub_date', '-id'),
+                 user=None):
+        super().__init__(queryset, per_page, ordering)
+        self.user = user
+
+    def rows(self, values, reverse, limit):
+        keys = page_keys(self.user, limit, values, reverse)
+        if not keys:
+            return []
+        posts = feed_queryset(Post.objects.all()).in_bulk(
+            [post_id for _, post_id in keys]
+        )
+        return [posts[post_id] for _, post_id in keys if post_id in posts]
@@ -0,0 +1,179 @@
+"""Потоковая выгрузка и загрузка данных в формате NDJSON.
+
+Каждая строка — одна запись: {"model": "post", "id": 1, ...}. Модели
+идут в порядке зависимостей (пользователи, группы, подписки, посты,
+комментарии), поэтому при загрузке связанные строки уже в базе.
+
+Выгрузка читает таблицы итератором порциями по chunk_size строк,
+загрузка пишет их bulk_create пачками по batch_size: память не зависит
+от объёма данных. bulk_create не отправляет сигналы, поэтому счётчики,
+ленты подписок, поисковый индекс и ссылки на картинки пересобираются
+один раз в конце загрузки, а миниатюры и варианты картинок постов
+готовят фоновые задачи. Каждая пачка коммитится отдельно, чтобы
+загрузка десятков миллионов строк не держала одну огромную транзакцию.
+Файлы картинок не выгружаются: каталог media переносится отдельно.
+"""
+import json
+from contextlib import contextmanager
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.color import no_style
+from django.db import connection
+from django.db.models import Count
+
+from . import tasks
+from .models import Comment, Follow, Group, ImageBlob, Post, User
+
+CHUNK_SIZE = 2000
+BATCH_SIZE = 1000
+
+# Выгружаемые модели и поля в порядке загрузки
+MODELS = {
+    'user': (User, (
+        'id', 'username', 'password', 'email', 'first_name', 'last_name',
+        'is_active', 'is_staff', 'is_superuser', 'date_joined',
+        'last_login',
+    )),
+    'group': (Group, ('id', 'title', 'slug', 'description')),
+    'follow': (Follow, ('id', 'user_id', 'author_id')),
+    'post': (Post, (
+        'id', 'text', 'pub_date', 'author_id', 'group_id', 'image',
+    )),
+    'comment': (Comment, ('id', 'post_id', 'author_id', 'text', 'created')),
+}
+REBUILD_COMMANDS = ('recount', 'rebuild_timelines', 'rebuild_search_index')
+
+
+def _encode(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def export_records(chunk_size=CHUNK_SIZE):
+    """Генератор записей всех моделей в порядке загрузки"""
+    for label, (model, fields) in MODELS.items():
+        rows = model.objects.order_by('pk').values_list(*fields)
+        for row in rows.iterator(chunk_size=chunk_size):
+            record = {'model': label}
+            record.update(zip(fields, map(_encode, row)))
+            yield record
+
+
+def dump(stream, chunk_size=CHUNK_SIZE):
+    """Пишет записи в stream построчно и возвращает их число по моделям"""
+    counts = dict.fromkeys(MODELS, 0)
+    for record in export_records(chunk_size):
+        stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        counts[record['model']] += 1
+    return counts
+
+
+@contextmanager
+def keep_auto_now_add(*models):
+    """Сохраняет даты из выгрузки вместо текущего времени"""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _flush(label, batch):
+    model, fields = MODELS[label]
+    # Размер одного INSERT внутри пачки bulk_create подбирает сам
+    # по ограничениям базы на число параметров
+    model.objects.bulk_create(
+        [model(**{field: row.get(field) for field in fields})
+         for row in batch]
+    )
+
+
+def load_records(records, batch_size=BATCH_SIZE):
+    """Записывает записи пачками и возвращает их число по моделям"""
+    counts = dict.fromkeys(MODELS, 0)
+    label, batch = None, []
+    with keep_auto_now_add(*(model for model, _ in MODELS.values())):
+        for record in records:
+            if record['model'] not in MODELS:
+                raise ValueError(f'Неизвестная модель: {record["model"]}')
+            if batch and (record['model'] != label
+                          or len(batch) >= batch_size):
+                _flush(label, batch)
+                batch = []
+            label = record['model']
+            batch.append(record)
+            counts[label] += 1
+        if batch:
+            _flush(label, batch)
+    return counts
+
+
+def read_records(stream):
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def reset_sequences():
+    """Сдвигает автоинкремент за загруженные id (PostgreSQL)"""
+    models = [model for model, _ in MODELS.values()]
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def rebuild_image_blobs():
+    """Счётчики ссылок на картинки по загруженным постам"""
+    refs = Post.objects.exclude(image='').exclude(image=None).order_by(
+    ).values_list('image').annotate(refs=Count('id'))
+    ImageBlob.objects.bulk_create(
+        (ImageBlob(name=name, refs=count)
+         for name, count in refs.iterator()),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def occupied_tables():
+    """Модели выгрузки, в таблицах которых уже есть строки"""
+    return [
+        label for label, (model, _) in MODELS.items()
+        if model.objects.exists()
+    ]
+
+
+def prepare_images():
+    """Ставит в очередь подготовку картинок всех постов с картинками"""
+    post_ids = Post.objects.exclude(image='').exclude(
+        image__isnull=True
+    ).order_by('pk').values_list('id', flat=True)
+    prepared = 0
+    for post_id in post_ids.iterator():
+        tasks.prepare_post_images.delay(post_id)
+        prepared += 1
+    return prepared
+
+
+def load(stream, batch_size=BATCH_SIZE, force=False):
+    """Загружает выгрузку в пустую базу и пересобирает производные данные.
+
+    С force загрузка идёт и в непустую базу: строки с уже занятыми id
+    прервут её с ошибкой.
+    """
+    occupied = occupied_tables()
+    if occupied and not force:
+        raise ValueError(f'База не пустая: {", ".join(occupied)}')
+    counts = load_records(read_records(stream), batch_size)
+    reset_sequences()
+    rebuild_image_blobs()
+    for command in REBUILD_COMMANDS:
+        call_command(command, stdout=StringIO())
+    prepare_images()
+    return counts
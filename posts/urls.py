@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'posts'
 
@@ -8,24 +8,48 @@ urlpatterns = [
     path('',
          views.index,
          name='index'),
+    path('feeds/rss/',
+         feeds.index_rss,
+         name='index_rss'),
+    path('feeds/atom/',
+         feeds.index_atom,
+         name='index_atom'),
     path('group/<slug:slug>/',
          views.group_posts,
          name='group'),
+    path('feeds/group/<slug:slug>/rss/',
+         feeds.group_rss,
+         name='group_rss'),
+    path('feeds/group/<slug:slug>/atom/',
+         feeds.group_atom,
+         name='group_atom'),
     path('new/',
          views.new_post,
          name='new_post'),
+    path('search/',
+         views.search,
+         name='search'),
     path('follow/',
          views.follow_index,
          name='follow_index'),
     path('<str:username>/',
          views.profile,
          name='profile'),
+    path('feeds/<str:username>/rss/',
+         feeds.author_rss,
+         name='profile_rss'),
+    path('feeds/<str:username>/atom/',
+         feeds.author_atom,
+         name='profile_atom'),
     path('<str:username>/<int:post_id>/',
          views.post_view,
          name='post'),
     path('<str:username>/<int:post_id>/edit/',
          views.post_edit,
          name='post_edit'),
+    path('<str:username>/<int:post_id>/comments/',
+         views.post_comments,
+         name='comments'),
     path('<str:username>/<int:post_id>/comment/',
          views.add_comment,
          name='add_comment'),
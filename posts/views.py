@@ -1,35 +1,74 @@
+from functools import partial
+
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
 
+from . import caching, timeline
+from .conditional import (
+    conditional_page, group_validators, post_validators, profile_validators,
+)
 from .forms import PostForm, CommentForm
 from .models import Group, Post, User, Follow
+from .paginator import (
+    AFTER_PARAM, CursorPaginator, InvalidCursor, encode_cursor, paginate,
+)
+from .queries import feed_queryset, post_queryset
+from .search import decode_search_cursor, get_backend as get_search_backend
 
 
-@cache_page(60)
+@caching.cache_page_versioned(
+    lambda request: [caching.INDEX, caching.GROUPS]
+)
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, settings.POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_list = feed_queryset(Post.objects.all())
     return render(request, 'index.html', {
-        'page': page,
-        'paginator': paginator
+        'cache_version': caching.request_version(
+            request, caching.INDEX, caching.GROUPS
+        ),
+        **paginate(request, post_list),
     })
 
 
+@conditional_page(group_validators)
+@caching.cache_page_versioned(
+    lambda request, slug: caching.group_page_scopes(slug)
+)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    paginator = Paginator(post_list, settings.POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_list = feed_queryset(group.posts.all())
     return render(request, 'group.html', {
         'group': group,
-        'page': page,
-        'paginator': paginator
+        **paginate(request, post_list),
+    })
+
+
+def search(request):
+    """Полнотекстовый поиск по постам"""
+    query = request.GET.get('q', '').strip()
+    per_page = settings.POSTS_PER_PAGE
+    after = None
+    try:
+        if request.GET.get(AFTER_PARAM):
+            after = decode_search_cursor(request.GET[AFTER_PARAM])
+    except InvalidCursor:
+        pass
+    hits = get_search_backend().search(query, per_page + 1, after)
+    next_cursor = None
+    if len(hits) > per_page:
+        hits = hits[:per_page]
+        next_cursor = encode_cursor([hits[-1].rank, hits[-1].post_id])
+    posts = feed_queryset(Post.objects.all()).in_bulk(
+        [hit.post_id for hit in hits]
+    )
+    results = [
+        (posts[hit.post_id], hit.snippet)
+        for hit in hits if hit.post_id in posts
+    ]
+    return render(request, 'search.html', {
+        'query': query,
+        'results': results,
+        'next_cursor': next_cursor,
     })
 
 
@@ -47,12 +86,16 @@ def new_post(request):
     return redirect('posts:index')
 
 
+@conditional_page(profile_validators)
+@caching.cache_page_versioned(
+    lambda request, username: caching.profile_page_scopes(username)
+)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    paginator = Paginator(post_list, settings.POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    author = get_object_or_404(
+        User.objects.select_related('stats'),
+        username=username
+    )
+    post_list = feed_queryset(author.posts.all())
     following = (
         request.user.is_authenticated
         and (request.user != author)
@@ -61,16 +104,28 @@ def profile(request, username):
             author=author).exists()
     )
     return render(request, 'profile.html', {
-        'page': page,
         'author': author,
-        'paginator': paginator,
         'following': following,
+        **paginate(request, post_list),
     })
 
 
+@conditional_page(post_validators)
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, author__username=username, id=post_id)
-    comments = post.comments.all()
+    post = get_object_or_404(
+        post_queryset(Post.objects.select_related('author__stats')),
+        author__username=username,
+        id=post_id
+    )
+    paginator = paginate_comments(post)
+    comments = paginator.queryset.order_by(
+        *paginator.ordering
+    )[:paginator.per_page]
+    # Первая порция остаётся QuerySet; есть ли продолжение, видно
+    # по счётчику комментариев поста без лишнего запроса
+    next_cursor = None
+    if comments and post.comments_count > len(comments):
+        next_cursor = paginator.encode(comments[len(comments) - 1])
     form = CommentForm()
     following = (
         request.user.is_authenticated
@@ -83,11 +138,37 @@ def post_view(request, username, post_id):
         'post': post,
         'author': post.author,
         'comments': comments,
+        'next_cursor': next_cursor,
         'form': form,
         'following': following
     })
 
 
+def paginate_comments(post):
+    """Курсорный пагинатор комментариев поста, новые сверху"""
+    return CursorPaginator(
+        post.comments.select_related('author'),
+        settings.COMMENTS_PER_PAGE,
+        ordering=('-created', '-id'),
+    )
+
+
+@conditional_page(post_validators)
+def post_comments(request, username, post_id):
+    """Фрагмент со следующей порцией комментариев для кнопки «Ещё»"""
+    post = get_object_or_404(
+        Post.objects.select_related('author').only('id', 'author__username'),
+        author__username=username,
+        id=post_id
+    )
+    comments = paginate_comments(post).get_page(request.GET.get(AFTER_PARAM))
+    return render(request, 'comment_list.html', {
+        'post': post,
+        'comments': comments.object_list,
+        'next_cursor': comments.next_cursor,
+    })
+
+
 @login_required
 def add_comment(request, username, post_id):
     post = get_object_or_404(Post, id=post_id,
@@ -123,14 +204,12 @@ def post_edit(request, username, post_id):
 @login_required
 def follow_index(request):
     """Страница с постами авторов на которые подписан пользователь"""
-    posts = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(posts, settings.POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    posts = feed_queryset(timeline.get_feed(request.user))
     return render(request, 'follow.html', {
         'post': posts,
-        'page': page,
-        'paginator': paginator,
+        **paginate(request, posts, paginator_class=partial(
+            timeline.FeedPaginator, user=request.user
+        )),
     })
 
 
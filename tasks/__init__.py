@@ -0,0 +1,9 @@
+"""Очередь фоновых задач с брокером в базе данных.
+
+Побочные эффекты записи (раскладка постов по лентам, поисковый индекс,
+миниатюры) объявляются функциями с декоратором @task и ставятся в
+очередь вызовом func.delay(...). Строка задачи пишется в той же
+транзакции, что и данные, поэтому воркер увидит её только после коммита,
+а запрос пользователя ждёт лишь сам коммит. Воркер — команда run_tasks.
+"""
+default_app_config = 'tasks.apps.TasksConfig'
@@ -0,0 +1,17 @@
+from django.apps import AppConfig
+
+
+class TasksConfig(AppConfig):
+    name = 'tasks'
+    verbose_name = 'Фоновые задачи'
+
+    def ready(self):
+        from yatube.metrics import REGISTRY
+
+        from .queue import queue_depth
+
+        REGISTRY.gauge(
+            'yatube_task_queue_depth',
+            'Задачи в очереди по состояниям',
+            queue_depth,
+        )
@@ -0,0 +1,58 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from tasks.queue import claim, execute
+
+
+def _init_worker():
+    # Соединения с базой, унаследованные от родителя, в дочернем
+    # процессе использовать нельзя
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди в пуле процессов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=settings.TASKS_WORKERS,
+            help='Число процессов; 0 — выполнять в текущем процессе',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и завершиться',
+        )
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        executor = None
+        if processes:
+            executor = ProcessPoolExecutor(
+                max_workers=processes, initializer=_init_worker
+            )
+        done = failed = 0
+        try:
+            while True:
+                task_ids = claim(max(processes, 1) * 4)
+                if task_ids:
+                    results = (
+                        executor.map(execute, task_ids) if executor
+                        else map(execute, task_ids)
+                    )
+                    for result in results:
+                        done += result
+                        failed += not result
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(settings.TASKS_POLL_INTERVAL)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if executor:
+                executor.shutdown()
+        self.stdout.write(f'Выполнено задач: {done}, с ошибкой: {failed}')
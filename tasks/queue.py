@@ -0,0 +1,128 @@
+import json
+import logging
+import random
+import traceback
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+
+def task(max_attempts=None, backoff=None):
+    """Объявляет функцию фоновой задачей.
+
+    Аргументы задачи должны сериализоваться в JSON. backoff — пауза
+    перед второй попыткой в секундах, дальше она удваивается.
+    """
+    def decorator(func):
+        func.task_name = f'{func.__module__}.{func.__name__}'
+        func.max_attempts = max_attempts or settings.TASKS_MAX_ATTEMPTS
+        func.backoff = backoff or settings.TASKS_RETRY_BACKOFF
+
+        @wraps(func)
+        def delay(*args, **kwargs):
+            return enqueue(func, *args, **kwargs)
+
+        func.delay = delay
+        return func
+    return decorator
+
+
+def enqueue(func, *args, **kwargs):
+    """Ставит вызов в очередь, в режиме TASKS_EAGER выполняет сразу"""
+    if settings.TASKS_EAGER:
+        func(*args, **kwargs)
+        return None
+    return Task.objects.create(
+        name=func.task_name,
+        payload=json.dumps({'args': args, 'kwargs': kwargs}),
+        max_attempts=func.max_attempts,
+    )
+
+
+def queue_depth():
+    """Пары (метки, число задач) для датчика очереди"""
+    counts = dict(
+        Task.objects.order_by().values_list('status').annotate(Count('id'))
+    )
+    return [
+        ({'status': status}, counts.get(status, 0))
+        for status, _ in Task.STATUSES
+    ]
+
+
+def claim(limit):
+    """Забирает готовые к запуску задачи и возвращает их id.
+
+    Задача, которая выполняется дольше TASKS_VISIBILITY_TIMEOUT, считается
+    брошенной упавшим воркером и забирается снова.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.TASKS_VISIBILITY_TIMEOUT)
+    candidates = Task.objects.filter(
+        Q(status=Task.QUEUED, run_at__lte=now)
+        | Q(status=Task.RUNNING, started_at__lt=stale)
+    ).values_list('id', 'status', 'started_at')[:limit]
+    claimed = []
+    for task_id, status, started_at in candidates:
+        # Условное обновление: из нескольких воркеров задачу получит один
+        updated = Task.objects.filter(
+            id=task_id, status=status, started_at=started_at
+        ).update(
+            status=Task.RUNNING,
+            started_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if updated:
+            claimed.append(task_id)
+    return claimed
+
+
+def retry_delay(backoff, attempts):
+    # Экспоненциальная пауза со случайной добавкой, чтобы повторы
+    # упавших вместе задач не приходили одновременно
+    delay = backoff * 2 ** (attempts - 1)
+    return delay + random.uniform(0, delay / 2)
+
+
+def _fail(item, func, error):
+    if item.attempts >= item.max_attempts:
+        Task.objects.filter(id=item.id).update(
+            status=Task.FAILED, error=error
+        )
+        return
+    backoff = getattr(func, 'backoff', settings.TASKS_RETRY_BACKOFF)
+    Task.objects.filter(id=item.id).update(
+        status=Task.QUEUED,
+        run_at=timezone.now() + timedelta(
+            seconds=retry_delay(backoff, item.attempts)
+        ),
+        error=error,
+    )
+
+
+def execute(task_id):
+    """Выполняет забранную задачу. True — задача выполнена"""
+    item = Task.objects.filter(id=task_id, status=Task.RUNNING).first()
+    if item is None:
+        return False
+    func = None
+    try:
+        func = import_string(item.name)
+        payload = json.loads(item.payload)
+        func(*payload['args'], **payload['kwargs'])
+    except Exception:
+        logger.exception(
+            'Задача %s (%s) завершилась ошибкой', item.id, item.name
+        )
+        _fail(item, func, traceback.format_exc())
+        return False
+    Task.objects.filter(id=item.id).delete()
+    return True
@@ -0,0 +1,89 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from posts.models import Follow, Post, TimelineEntry, User
+from tasks.models import Task
+from tasks.queue import claim, execute, task
+
+CALLS = []
+
+
+@task()
+def remember(value):
+    CALLS.append(value)
+
+
+@task(max_attempts=2, backoff=10)
+def broken():
+    raise ValueError('Ошибка задачи')
+
+
+@override_settings(TASKS_EAGER=False)
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_delay_stores_task(self):
+        """Вызов delay записывает задачу, но не выполняет её"""
+        remember.delay('значение')
+        item = Task.objects.get()
+        self.assertEqual(item.name, 'tasks.tests.remember')
+        self.assertEqual(item.status, Task.QUEUED)
+        self.assertEqual(CALLS, [])
+
+    def test_executed_task_is_deleted(self):
+        """Выполненная задача удаляется из очереди"""
+        remember.delay('значение')
+        for task_id in claim(10):
+            self.assertTrue(execute(task_id))
+        self.assertEqual(CALLS, ['значение'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_task_is_claimed_once(self):
+        """Забранную задачу не получит другой воркер"""
+        remember.delay('значение')
+        self.assertEqual(len(claim(10)), 1)
+        self.assertEqual(claim(10), [])
+
+    def test_abandoned_task_is_claimed_again(self):
+        """Задачу упавшего воркера забирают после тайм-аута"""
+        remember.delay('значение')
+        claim(10)
+        Task.objects.update(started_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(len(claim(10)), 1)
+
+    def test_failed_task_is_retried_with_backoff(self):
+        """Упавшая задача повторяется позже, а затем помечается ошибкой"""
+        broken.delay()
+        execute(claim(10)[0])
+        item = Task.objects.get()
+        self.assertEqual(item.status, Task.QUEUED)
+        self.assertGreaterEqual(
+            item.run_at, timezone.now() + timedelta(seconds=9)
+        )
+        self.assertIn('Ошибка задачи', item.error)
+        self.assertEqual(claim(10), [])
+        Task.objects.update(run_at=timezone.now())
+        execute(claim(10)[0])
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+
+@override_settings(TASKS_EAGER=False)
+class RunTasksCommandTests(TestCase):
+    def test_worker_fans_out_posts(self):
+        """Лента подписчика заполняется воркером, а не запросом"""
+        author = User.objects.create(username='author')
+        reader = User.objects.create(username='reader')
+        Follow.objects.create(user=reader, author=author)
+        Post.objects.create(text='Пост', author=author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        out = StringIO()
+        call_command('run_tasks', '--once', '--processes=0', stdout=out)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=reader).count(), 1
+        )
+        self.assertIn('с ошибкой: 0', out.getvalue())
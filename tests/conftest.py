@@ -1,4 +1,31 @@
+import pytest
+
+from posts.tests.budgets import DATA_SIZES
+
 pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(params=DATA_SIZES, ids=lambda size: f'per_page={size}')
+def posts_per_page(request, settings):
+    from django.core.cache import cache
+    settings.POSTS_PER_PAGE = request.param
+    cache.clear()
+    return request.param
+
+
+@pytest.fixture
+def query_budget(posts_per_page):
+    from posts.tests.utils import query_budget
+
+    def check(url_name, using='default'):
+        return query_budget(url_name, posts_per_page, using)
+    return check
+
+
+def pytest_terminal_summary(terminalreporter):
+    from posts.tests.utils import format_offenders
+    for line in format_offenders():
+        terminalreporter.write_line(line)
@@ -0,0 +1,50 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Post
+
+
+def create_posts(author, group, count):
+    for num in range(count):
+        post = Post.objects.create(text=f'Пост {num}', author=author, group=group)
+        Comment.objects.create(post=post, author=author, text='Комментарий')
+    return post
+
+
+class TestQueryBudgets:
+
+    @pytest.mark.django_db
+    def test_feed_pages_fit_query_budget(self, user_client, user, group,
+                                         django_user_model, posts_per_page,
+                                         query_budget):
+        author = django_user_model.objects.create_user(username='author')
+        Follow.objects.create(user=user, author=author)
+        create_posts(author, group, posts_per_page)
+        urls = {
+            'posts:index': reverse('posts:index'),
+            'posts:group': reverse('posts:group', args=[group.slug]),
+            'posts:profile': reverse('posts:profile', args=[author.username]),
+            'posts:follow_index': reverse('posts:follow_index'),
+        }
+        for url_name, url in urls.items():
+            cache.clear()
+            with query_budget(url_name):
+                response = user_client.get(url)
+            assert response.status_code == 200, (
+                f'Страница `{url}` не открывается'
+            )
+
+    @pytest.mark.django_db
+    def test_post_page_fits_query_budget(self, user_client, user, group,
+                                         posts_per_page, query_budget):
+        post = create_posts(user, group, 1)
+        for num in range(posts_per_page - 1):
+            Comment.objects.create(post=post, author=user, text=str(num))
+        with query_budget('posts:post'):
+            response = user_client.get(
+                reverse('posts:post', args=[user.username, post.id])
+            )
+        assert response.status_code == 200, (
+            'Страница `/<username>/<post_id>/` не открывается'
+        )
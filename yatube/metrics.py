@@ -0,0 +1,363 @@
+"""Метрики в формате Prometheus: счётчики, гистограммы и датчики.
+
+Каждый процесс (воркер gunicorn, воркер задач) считает свои значения
+в памяти и не чаще раза в METRICS_FLUSH_INTERVAL секунд сбрасывает их
+в файл METRICS_DIR/<pid>-<время запуска>.json. Эндпоинт /metrics
+суммирует файлы всех процессов, поэтому на графиках видна вся
+установка, а не тот воркер, который принял запрос Prometheus. Без
+METRICS_DIR метрики только свои у процесса.
+
+Время запуска в имени файла не даёт новому процессу с тем же pid
+затереть значения старого. Файлы завершившихся процессов /metrics
+переносит в METRICS_DIR/archive.json, так что счётчики не убывают,
+а число файлов не растёт. Живость проверяется по pid, поэтому каталог
+METRICS_DIR должен принадлежать процессам одной машины (одного
+пространства pid), как и в multiprocess-режиме prometheus_client.
+
+Датчики считаются в момент запроса /metrics функцией-сборщиком и между
+процессами не суммируются.
+"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+from yatube import timing
+from yatube.sqlite import WriteLock
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+ARCHIVE = 'archive.json'
+ARCHIVE_LOCK = 'archive.lock'
+
+
+def _label_key(labels):
+    return json.dumps(sorted(labels.items()), ensure_ascii=False)
+
+
+def _format_labels(key, extra=()):
+    pairs = [*json.loads(key), *extra]
+    if not pairs:
+        return ''
+    body = ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', r'\\').replace('"', r'\"'),
+        )
+        for name, value in pairs
+    )
+    return '{' + body + '}'
+
+
+def _format_value(value):
+    return 'Inf' if value == float('inf') else repr(float(value))
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # Процесс есть, но принадлежит другому пользователю
+        return True
+    return True
+
+
+def _process_pid(name):
+    """pid из имени файла процесса или None для прочих файлов"""
+    pid, _, started = name[:-len('.json')].partition('-')
+    if not (pid.isdigit() and started.isdigit()):
+        return None
+    return int(pid)
+
+
+def _read(path):
+    try:
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _write(path, values):
+    descriptor, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path), suffix='.tmp'
+    )
+    with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+        json.dump(values, file, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, registry, name, documentation):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+
+    def inc(self, amount=1, **labels):
+        self.registry.update(self.name, _label_key(labels), amount)
+
+    @staticmethod
+    def merge(total, value):
+        return (total or 0) + value
+
+    def expose(self, samples):
+        for key, value in sorted(samples.items()):
+            yield f'{self.name}{_format_labels(key)} {_format_value(value)}'
+
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, registry, name, documentation,
+                 buckets=LATENCY_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        index = next(
+            number for number, bound in enumerate(self.buckets)
+            if value <= bound
+        )
+        self.registry.update(
+            self.name, _label_key(labels), (index, value)
+        )
+
+    def merge(self, total, value):
+        """Значение — [счётчики корзин..., сумма]"""
+        total = total or [0] * (len(self.buckets) + 1)
+        if isinstance(value, tuple):
+            index, observed = value
+            total[index] += 1
+            total[-1] += observed
+        else:
+            total = [old + new for old, new in zip(total, value)]
+        return total
+
+    def expose(self, samples):
+        for key, value in sorted(samples.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, value):
+                cumulative += count
+                labels = _format_labels(key, [('le', _format_value(bound))])
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            yield f'{self.name}_sum{_format_labels(key)} {value[-1]!r}'
+            yield f'{self.name}_count{_format_labels(key)} {cumulative}'
+
+
+class Gauge:
+    """Датчик, значение которого считает collect() при запросе /metrics"""
+    type = 'gauge'
+
+    def __init__(self, registry, name, documentation, collect):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.collect = collect
+
+    def expose(self, samples):
+        for labels, value in self.collect():
+            key = _label_key(labels)
+            yield f'{self.name}{_format_labels(key)} {_format_value(value)}'
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.values = {}
+        self.lock = threading.Lock()
+        self.flushed = 0
+        self.started = int(time.time() * 1000)
+
+    def counter(self, name, documentation):
+        return self.register(Counter(self, name, documentation))
+
+    def histogram(self, name, documentation, **kwargs):
+        return self.register(Histogram(self, name, documentation, **kwargs))
+
+    def gauge(self, name, documentation, collect):
+        return self.register(Gauge(self, name, documentation, collect))
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def reset(self):
+        with self.lock:
+            self.values = {}
+            self.flushed = 0
+            self.started = int(time.time() * 1000)
+
+    def update(self, name, key, value):
+        metric = self.metrics[name]
+        with self.lock:
+            samples = self.values.setdefault(name, {})
+            samples[key] = metric.merge(samples.get(key), value)
+        self.maybe_flush()
+
+    def path(self):
+        return os.path.join(
+            settings.METRICS_DIR, f'{os.getpid()}-{self.started}.json'
+        )
+
+    def maybe_flush(self):
+        if (settings.METRICS_DIR
+                and time.time() - self.flushed
+                >= settings.METRICS_FLUSH_INTERVAL):
+            self.flush()
+
+    def flush(self):
+        """Сохраняет значения процесса в свой файл в METRICS_DIR"""
+        if not settings.METRICS_DIR:
+            return
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        with self.lock:
+            values = json.loads(json.dumps(self.values))
+            self.flushed = time.time()
+        _write(self.path(), values)
+
+    def merge(self, totals, values):
+        for metric_name, samples in values.items():
+            metric = self.metrics.get(metric_name)
+            if metric is None:
+                continue
+            merged = totals.setdefault(metric_name, {})
+            for key, value in samples.items():
+                merged[key] = metric.merge(merged.get(key), value)
+        return totals
+
+    def archive_dead(self, names):
+        """Переносит значения завершившихся процессов в archive.json и
+        возвращает оставшиеся файлы"""
+        directory = settings.METRICS_DIR
+        dead = [
+            name for name in names
+            if _process_pid(name) is not None
+            and not _is_alive(_process_pid(name))
+        ]
+        if not dead:
+            return names
+        archive = os.path.join(directory, ARCHIVE)
+        totals = _read(archive) or {}
+        for name in dead:
+            values = _read(os.path.join(directory, name))
+            if values is not None:
+                self.merge(totals, values)
+        _write(archive, totals)
+        for name in dead:
+            os.remove(os.path.join(directory, name))
+        return [name for name in names if name not in dead] + [ARCHIVE]
+
+    def collect(self):
+        """Значения всех процессов: {имя: {метки: значение}}"""
+        if not settings.METRICS_DIR:
+            with self.lock:
+                return json.loads(json.dumps(self.values))
+        self.flush()
+        directory = settings.METRICS_DIR
+        # Архив и чтение под одной блокировкой: параллельный /metrics
+        # не увидит значения процесса и в его файле, и в архиве
+        lock = WriteLock(
+            os.path.join(directory, ARCHIVE_LOCK),
+            settings.METRICS_FLUSH_INTERVAL,
+        )
+        with lock as locked:
+            names = [
+                name for name in os.listdir(directory)
+                if name.endswith('.json')
+            ]
+            if locked:
+                names = self.archive_dead(names)
+            totals = {}
+            for name in set(names):
+                values = _read(os.path.join(directory, name))
+                if values is not None:
+                    self.merge(totals, values)
+        return totals
+
+    def expose(self):
+        values = self.collect()
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            lines.extend(metric.expose(values.get(name, {})))
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+atexit.register(REGISTRY.flush)
+if hasattr(os, 'register_at_fork'):
+    # Дочерний процесс начинает со своих нулей, иначе значения родителя
+    # посчитались бы дважды
+    os.register_at_fork(after_in_child=REGISTRY.reset)
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    'yatube_request_duration_seconds', 'Время ответа view'
+)
+DB_QUERIES = REGISTRY.counter(
+    'yatube_db_queries_total', 'SQL-запросы, выполненные view'
+)
+DB_TIME = REGISTRY.counter(
+    'yatube_db_query_seconds_total', 'Время SQL-запросов view'
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    'yatube_cache_requests_total',
+    'Обращения к кешу страниц и фрагментов: hit, stale, miss',
+)
+IMAGES_PROCESSED = REGISTRY.counter(
+    'yatube_images_processed_total', 'Созданные миниатюры и варианты'
+)
+IMAGE_TIME = REGISTRY.counter(
+    'yatube_image_processing_seconds_total', 'Время обработки картинок'
+)
+
+
+class MetricsMiddleware:
+    """Переносит замеры запроса из yatube.timing в метрики.
+
+    Стоит в MIDDLEWARE после ServerTimingMiddleware, чтобы его замеры
+    уже шли.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        measured = timing.current()
+        if measured is None:
+            return response
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        REQUEST_LATENCY.observe(
+            measured.total,
+            view=view,
+            method=request.method,
+            status=f'{response.status_code // 100}xx',
+        )
+        DB_QUERIES.inc(len(measured.queries), view=view)
+        DB_TIME.inc(measured.db_time, view=view)
+        for result, count in measured.cache.items():
+            if count:
+                CACHE_REQUESTS.inc(count, result=result)
+        return response
+
+
+def metrics_view(request):
+    allowed = settings.METRICS_ALLOWED_IPS
+    if allowed is not None and request.META.get('REMOTE_ADDR') not in allowed:
+        raise Http404
+    return HttpResponse(REGISTRY.expose(), content_type=CONTENT_TYPE)
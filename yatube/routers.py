@@ -0,0 +1,82 @@
+"""Маршрутизация запросов к базе: запись — в основную, чтение — в реплики.
+
+После записи пользователь на REPLICA_PIN_SECONDS закрепляется за основной
+базой: редирект после публикации поста или комментария должен показать
+изменение, даже если реплика ещё не догнала основную базу.
+"""
+import random
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'db_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+_state = threading.local()
+
+
+def pin():
+    """Направляет чтения текущего потока в основную базу"""
+    _state.pinned = True
+
+
+def reset():
+    _state.pinned = False
+    _state.wrote = False
+
+
+def is_pinned():
+    return getattr(_state, 'pinned', False)
+
+
+def has_written():
+    return getattr(_state, 'wrote', False)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or is_pinned():
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        # Всё, что поток прочитает после записи, должно её видеть
+        _state.wrote = True
+        pin()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Все алиасы — копии одной базы, поэтому связи между ними допустимы
+        aliases = settings.DATABASES
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+
+class ReplicaPinMiddleware:
+    """Закрепляет за основной базой запросы, которые пишут, и запросы
+    пользователя в течение REPLICA_PIN_SECONDS после записи"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        reset()
+        if (request.method not in SAFE_METHODS
+                or PIN_COOKIE in request.COOKIES):
+            pin()
+        try:
+            response = self.get_response(request)
+            if has_written() and settings.DATABASE_REPLICAS:
+                response.set_cookie(
+                    PIN_COOKIE,
+                    '1',
+                    max_age=settings.REPLICA_PIN_SECONDS,
+                    httponly=True,
+                    samesite='Lax',
+                )
+        finally:
+            reset()
+        return response
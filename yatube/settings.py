@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     'about',
     'users',
     'posts',
+    'tasks',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -49,7 +50,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yatube.timing.ServerTimingMiddleware',
+    'yatube.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'yatube.routers.ReplicaPinMiddleware',
+    'yatube.sqlite.SQLiteWriteQueueMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -66,12 +71,24 @@ INTERNAL_IPS = [
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
+# Шаблоны читаются с диска и компилируются один раз на процесс
+# (cached loader). Для правки шаблонов без перезапуска — False
+TEMPLATE_CACHE = True
+TEMPLATE_LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+if TEMPLATE_CACHE:
+    TEMPLATE_LOADERS = [
+        ("django.template.loaders.cached.Loader", TEMPLATE_LOADERS),
+    ]
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # DjangoTemplates, который учитывает время рендера в Server-Timing
+        "BACKEND": "yatube.timing.TimedDjangoTemplates",
         "DIRS": [TEMPLATES_DIR],
-        "APP_DIRS": True,
         "OPTIONS": {
+            "loaders": TEMPLATE_LOADERS,
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
@@ -91,9 +108,50 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+        # Соединение живёт между запросами, прагмы не выполняются заново
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            # Секунды ожидания блокировки базы
+            'timeout': 20,
+        },
+    },
+    # Копия основной базы только для чтения. Её актуальность
+    # обеспечивает репликация, а не Django
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.replica.sqlite3'),
+        'TEST': {
+            'NAME': os.path.join(BASE_DIR, 'test_db.replica.sqlite3'),
+        },
+    },
 }
 
+DATABASE_ROUTERS = ['yatube.routers.ReplicaRouter']
+
+# Алиасы реплик, из которых читаются страницы. Пустой список — всё
+# читается из основной базы
+DATABASE_REPLICAS = []
+
+# Сколько секунд после записи пользователь читает из основной базы
+REPLICA_PIN_SECONDS = 10
+
+# Прагмы каждого соединения SQLite (см. yatube/sqlite.py)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,
+    # 256 МБ файла базы читаются через mmap
+    'mmap_size': 268435456,
+    # Отрицательное значение — размер кеша страниц в КБ (64 МБ)
+    'cache_size': -64000,
+    'temp_store': 'MEMORY',
+}
+
+# Очередь пишущих запросов на файловой блокировке, общей для процессов
+SQLITE_SERIALIZE_WRITES = True
+SQLITE_WRITE_LOCK_FILE = os.path.join(BASE_DIR, 'db.sqlite3.write-lock')
+SQLITE_WRITE_LOCK_TIMEOUT = 30
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -148,9 +206,108 @@ EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
 POSTS_PER_PAGE = 10
+# Готовый HTML карточек постов в кеше, одна копия на всех читателей:
+# неизменившиеся карточки подставляются в ленту без рендера,
+# дорисовываются только кнопки читателя (posts/cards.py)
+POST_CARD_CACHE = True
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+# Записей в лентах RSS и Atom (posts/feeds.py)
+FEED_ITEMS = 20
+# Комментарии на странице поста; остальные подгружаются кнопкой «Ещё»
+COMMENTS_PER_PAGE = 20
+
+# Миниатюры картинок постов готовит фоновая задача после сохранения поста
+THUMBNAIL_GEOMETRIES = [
+    ('960x339', {'crop': 'center', 'upscale': True}),
+]
+# Варианты картинки поста для srcset: ширины, форматы и пропорции карточки
+POST_IMAGE_WIDTHS = [320, 640, 960]
+POST_IMAGE_FORMATS = ['WEBP', 'JPEG']
+POST_IMAGE_ASPECT = (960, 339)
+
+# Поисковый индекс постов. Для PostgreSQL:
+# 'posts.search.PostgresSearchBackend'
+SEARCH_BACKEND = 'posts.search.SQLiteFTSBackend'
+
+# Ленты листаются курсорами ?after=/?before=. В режиме совместимости
+# в контекст шаблонов по-прежнему передаются Page и Paginator
+PAGINATION_COMPAT = True
+
+# Материализованная лента подписок: сколько записей хранить на читателя
+# и с какого числа подписчиков посты автора не раскладываются по лентам,
+# а подтягиваются при чтении
+TIMELINE_LENGTH = 1000
+TIMELINE_FANOUT_LIMIT = 5000
 
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+# Поколения областей кеша хранятся в базе (posts.CacheScope), поэтому
+# страницы в кеше своего процесса сбрасываются изменениями из любого.
+# Чтобы и блокировки пересчёта работали между процессами gunicorn,
+# кеш должен быть общим, например:
+# CACHES = {
+#     'default': {
+#         'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+#         'LOCATION': 'yatube_cache',
+#     }
+# }
+
+# Страницы сбрасываются сигналами при изменении данных через поколения
+# в базе, поэтому время жизни записей в кеше может быть большим
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+# Устаревшее значение отдаётся, пока его пересчитывает другой запрос
+CACHE_STALE_TIMEOUT = 60 * 5
+CACHE_LOCK_TIMEOUT = 10
+CACHE_LOCK_POLL_INTERVAL = 0.05
+# Коэффициент вероятностного раннего пересчёта (XFetch)
+CACHE_EARLY_EXPIRY_BETA = 1.0
+
+# Фоновые задачи (приложение tasks) выполняет manage.py run_tasks,
+# запросы их только ставят в очередь. В режиме TASKS_EAGER задачи
+# выполняются сразу при постановке в очередь — так работают тесты
+# (yatube/test_settings.py); для разработки без воркера можно включить
+TASKS_EAGER = False
+TASKS_WORKERS = 2
+TASKS_MAX_ATTEMPTS = 5
+# Пауза перед повтором в секундах, удваивается с каждой попыткой
+TASKS_RETRY_BACKOFF = 5
+TASKS_POLL_INTERVAL = 1
+# Через сколько секунд задача упавшего воркера снова попадает в очередь
+TASKS_VISIBILITY_TIMEOUT = 600
+
+# Замеры запросов (yatube/timing.py). Заголовок Server-Timing видят
+# клиенты, поэтому его можно выключить, оставив строки лога
+SERVER_TIMING_HEADER = True
+# Запросы дольше этого времени логируются как медленные
+SLOW_REQUEST_MS = 500
+# Доля медленных запросов, которые логируются со списком SQL
+SLOW_REQUEST_SAMPLE_RATE = 0.1
+
+# Метрики Prometheus (yatube/metrics.py). Процессы пишут значения
+# в METRICS_DIR, /metrics их суммирует; None — метрики только процесса.
+# Каталог локальный для машины: живость процессов проверяется по pid
+METRICS_DIR = None
+# Например: METRICS_DIR = os.path.join(BASE_DIR, 'metrics')
+METRICS_FLUSH_INTERVAL = 1
+# Адреса, которым доступен /metrics; None — всем
+METRICS_ALLOWED_IPS = INTERNAL_IPS
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        # WARNING — только медленные запросы, INFO — строка на каждый
+        'yatube.timing': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+    },
+}
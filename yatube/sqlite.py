@@ -0,0 +1,156 @@
+"""Рабочий режим SQLite для нескольких процессов gunicorn.
+
+Каждое новое соединение получает прагмы из SQLITE_PRAGMAS: журнал WAL
+позволяет читать во время записи, synchronous=NORMAL убирает fsync на
+каждый коммит, busy_timeout заставляет ждать блокировку вместо ошибки
+«database is locked».
+
+SQLite допускает только одного писателя. Чтобы всплеск записей не
+превращался в гонку за блокировку базы, запросы, которые пишут, встают
+в очередь на файловой блокировке (SQLiteWriteQueueMiddleware), общей для
+всех процессов. Очередь занимается перед первой записью в базу, а не по
+методу запроса.
+"""
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: остаётся очередь внутри процесса
+    fcntl = None
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def apply_pragmas(cursor, pragmas):
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def configure_connection(sender, connection, **kwargs):
+    """Обработчик connection_created: прагмы для соединений SQLite"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, settings.SQLITE_PRAGMAS)
+
+
+class WriteLock:
+    """Очередь писателей: блокировка потоков процесса и файла для
+    остальных процессов.
+
+    Если блокировку не удалось получить за timeout секунд, запись идёт
+    без очереди и полагается на busy_timeout базы.
+    """
+    poll_interval = 0.005
+
+    def __init__(self, path, timeout=None):
+        self.path = path
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def acquire(self):
+        timeout = -1 if self.timeout is None else self.timeout
+        if not self._lock.acquire(timeout=timeout):
+            return False
+        if fcntl is None:
+            return True
+        descriptor = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = None if self.timeout is None else (
+            time.monotonic() + self.timeout
+        )
+        while True:
+            try:
+                fcntl.flock(descriptor, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if deadline is not None and time.monotonic() > deadline:
+                    os.close(descriptor)
+                    self._lock.release()
+                    return False
+                time.sleep(self.poll_interval)
+        self._local.descriptor = descriptor
+        return True
+
+    def release(self):
+        descriptor = getattr(self._local, 'descriptor', None)
+        if descriptor is not None:
+            self._local.descriptor = None
+            fcntl.flock(descriptor, fcntl.LOCK_UN)
+            os.close(descriptor)
+        self._lock.release()
+
+    def __enter__(self):
+        self._local.locked = self.acquire()
+        return self._local.locked
+
+    def __exit__(self, *exc_info):
+        if self._local.locked:
+            self.release()
+
+
+_write_lock = None
+
+
+def get_write_lock():
+    global _write_lock
+    if _write_lock is None:
+        _write_lock = WriteLock(
+            settings.SQLITE_WRITE_LOCK_FILE,
+            settings.SQLITE_WRITE_LOCK_TIMEOUT,
+        )
+    return _write_lock
+
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+class QueuedWrites:
+    """execute_wrapper соединения: встаёт в очередь писателей перед
+    первым изменяющим запросом и держит её до release()"""
+
+    def __init__(self, lock):
+        self.lock = lock
+        self.locked = False
+        self.waited = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if not self.waited and sql.lstrip()[:7].upper().startswith(
+            WRITE_STATEMENTS
+        ):
+            self.waited = True
+            self.locked = self.lock.acquire()
+        return execute(sql, params, many, context)
+
+    def release(self):
+        if self.locked:
+            self.locked = False
+            self.lock.release()
+
+
+class SQLiteWriteQueueMiddleware:
+    """По одному пишущему запросу за раз на все процессы.
+
+    В очередь встаёт запрос, который действительно пишет в базу, с его
+    первого INSERT, UPDATE или DELETE до конца ответа, каким бы ни был
+    метод. Чтения и POST без записей, например неудачный вход, идут
+    без очереди.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        connection = connections[DEFAULT_DB_ALIAS]
+        if (not settings.SQLITE_SERIALIZE_WRITES
+                or connection.vendor != 'sqlite'):
+            return self.get_response(request)
+        queue = QueuedWrites(get_write_lock())
+        try:
+            with connection.execute_wrapper(queue):
+                return self.get_response(request)
+        finally:
+            queue.release()
@@ -0,0 +1,11 @@
+"""Настройки для тестов: рабочие настройки и то, что нужно только
+в тестах. manage.py test и pytest подключают их сами."""
+from .settings import *  # noqa: F401,F403
+
+# Фоновые задачи выполняются сразу при постановке в очередь, чтобы
+# тесты видели их результат без воркера run_tasks
+TASKS_EAGER = True
+
+# После прогона тестов печатается отчёт о самых дорогих по запросам
+# страницах (posts/tests/budgets.py)
+TEST_RUNNER = 'posts.tests.runner.QueryBudgetRunner'
@@ -0,0 +1,160 @@
+"""Замеры каждого запроса: база, кеш, шаблоны, миниатюры.
+
+ServerTimingMiddleware собирает метрики запроса в RequestMetrics текущего
+потока и отдаёт их заголовком Server-Timing и строкой лога в JSON.
+Медленные запросы (дольше SLOW_REQUEST_MS) логируются со списком SQL
+с вероятностью SLOW_REQUEST_SAMPLE_RATE. Вне запроса (команды, воркеры)
+метрики не собираются, и вызовы record/measure ничего не делают.
+
+Сбор дешёвый: один вызов time.perf_counter() вокруг каждого SQL-запроса
+и рендера шаблона, поэтому middleware включено всегда.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger('yatube.timing')
+
+_state = threading.local()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []
+        self.db_time = 0.0
+        self.cache = {'hit': 0, 'stale': 0, 'miss': 0}
+        self.durations = {'template': 0.0, 'thumbnail': 0.0}
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def as_dict(self):
+        return {
+            'total_ms': round(self.total * 1000, 2),
+            'db_ms': round(self.db_time * 1000, 2),
+            'queries': len(self.queries),
+            'cache': dict(self.cache),
+            **{
+                f'{name}_ms': round(value * 1000, 2)
+                for name, value in self.durations.items()
+            },
+        }
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.1f};'
+            f'desc="{len(self.queries)} queries"',
+            'cache;desc="{}"'.format(' '.join(
+                f'{name}={count}' for name, count in self.cache.items()
+            )),
+            f'tpl;dur={self.durations["template"] * 1000:.1f}',
+            f'thumb;dur={self.durations["thumbnail"] * 1000:.1f}',
+            f'total;dur={self.total * 1000:.1f}',
+        ])
+
+
+def current():
+    """Метрики текущего запроса или None"""
+    return getattr(_state, 'metrics', None)
+
+
+def record_cache(outcome):
+    """outcome — 'hit', 'stale' или 'miss'"""
+    metrics = current()
+    if metrics is not None:
+        metrics.cache[outcome] += 1
+
+
+@contextmanager
+def measure(name):
+    """Добавляет время блока к метрике name ('template', 'thumbnail')"""
+    metrics = current()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.durations[name] += time.perf_counter() - started
+
+
+def _query_timer(metrics, alias):
+    def wrapper(execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            metrics.db_time += duration
+            metrics.queries.append((alias, sql, duration))
+    return wrapper
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with measure('template'):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Шаблонизатор Django, который учитывает время рендера в метриках.
+
+    Засекается только шаблон верхнего уровня, include и extends
+    входят в его время.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+class ServerTimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = _state.metrics = RequestMetrics()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(
+                        _query_timer(metrics, alias)
+                    ))
+                response = self.get_response(request)
+            if settings.SERVER_TIMING_HEADER:
+                response['Server-Timing'] = metrics.server_timing()
+            self.log(request, response, metrics)
+        finally:
+            _state.metrics = None
+        return response
+
+    def log(self, request, response, metrics):
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            **metrics.as_dict(),
+        }
+        slow = metrics.total * 1000 >= settings.SLOW_REQUEST_MS
+        if slow and random.random() < settings.SLOW_REQUEST_SAMPLE_RATE:
+            record['sql'] = [
+                {'db': alias, 'ms': round(duration * 1000, 2), 'sql': sql}
+                for alias, sql, duration in metrics.queries
+            ]
+        logger.log(
+            logging.WARNING if slow else logging.INFO,
+            json.dumps(record, ensure_ascii=False),
+        )